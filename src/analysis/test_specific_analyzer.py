@@ -2,6 +2,7 @@
 Test-Specific Analyzers
 Each test type has unique analysis requirements and focus areas
 """
+import functools
 import statistics
 from typing import Dict, List, Any, Optional
 from datetime import datetime
@@ -9,6 +10,19 @@ from abc import ABC, abstractmethod
 from src.analysis.performance_analyzer import PerformanceAnalyzer
 
 
+def _quantile_sorted(ordered: List[float], i: int, n: int) -> float:
+    """
+    The i-th of n cut points of already-sorted data (at least two values).
+    Same result as statistics.quantiles(data, n=n)[i - 1], but computes only
+    the requested cut point and does not sort again.
+    """
+    ld = len(ordered)
+    m = ld + 1
+    j = min(max(i * m // n, 1), ld - 1)
+    delta = i * m - j * n
+    return (ordered[j - 1] * (n - delta) + ordered[j] * delta) / n
+
+
 class BaseTestAnalyzer(ABC):
     """Base class for test-specific analyzers."""
 
@@ -86,16 +100,17 @@ class PerformanceTestAnalyzer(BaseTestAnalyzer):
                 "interpretation": self._interpret_predictability(cv_total)
             }
 
-        # Baseline establishment
+        # Baseline establishment (sorted once for every percentile and the range)
+        ordered = sorted(total_times)
         analysis["baseline_metrics"] = {
             "recommended_sla": {
-                "p50": statistics.median(total_times) if total_times else 0,
-                "p95": statistics.quantiles(total_times, n=20)[18] if len(total_times) > 1 else total_times[0] if total_times else 0,
-                "p99": statistics.quantiles(total_times, n=100)[98] if len(total_times) > 10 else max(total_times) if total_times else 0
+                "p50": statistics.median(ordered) if ordered else 0,
+                "p95": _quantile_sorted(ordered, 19, 20) if len(ordered) > 1 else ordered[0] if ordered else 0,
+                "p99": _quantile_sorted(ordered, 99, 100) if len(ordered) > 10 else ordered[-1] if ordered else 0
             },
             "typical_range": {
-                "min": min(total_times) if total_times else 0,
-                "max": max(total_times) if total_times else 0
+                "min": ordered[0] if ordered else 0,
+                "max": ordered[-1] if ordered else 0
             }
         }
 
@@ -858,8 +873,14 @@ class TestAnalyzerFactory:
     }
 
     @classmethod
+    @functools.lru_cache(maxsize=8)
     def get_analyzer(cls, test_type: str) -> BaseTestAnalyzer:
-        """Get the appropriate analyzer for a test type."""
+        """
+        Get the appropriate analyzer for a test type.
+
+        Analyzers keep no per-run state, so one shared instance per test type
+        is returned instead of constructing a new one on every call.
+        """
         analyzer_class = cls._analyzers.get(test_type.lower())
         if not analyzer_class:
             # Default to performance analyzer if unknown
@@ -12,7 +12,7 @@ from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from dispatcher import GitHubWorkflowDispatcher, WorkflowDispatchRequest
+from dispatcher import GitHubWorkflowDispatcher, WorkflowDispatchRequest, close_shared_connector
 from config_manager import ConfigManager
 
 
@@ -181,22 +181,26 @@ async def main():
         print("\nCancelled")
         sys.exit(0)
 
-    if choice == "1":
-        await test_without_limit()
-    elif choice == "2":
-        await test_with_4_limit()
-    elif choice == "3":
-        await test_without_limit()
-        await test_with_4_limit()
-
-        print("\n" + "="*60)
-        print("COMPARISON SUMMARY")
-        print("="*60)
-        print("Without Limit: All 8 workflows dispatch immediately")
-        print("With 4-Limit:  First 4 dispatch, next 4 wait")
-        print("\nThis simulates what will happen on your 4-runner OpenShift!")
-    else:
-        print("Invalid choice")
+    try:
+        if choice == "1":
+            await test_without_limit()
+        elif choice == "2":
+            await test_with_4_limit()
+        elif choice == "3":
+            await test_without_limit()
+            await test_with_4_limit()
+
+            print("\n" + "="*60)
+            print("COMPARISON SUMMARY")
+            print("="*60)
+            print("Without Limit: All 8 workflows dispatch immediately")
+            print("With 4-Limit:  First 4 dispatch, next 4 wait")
+            print("\nThis simulates what will happen on your 4-runner OpenShift!")
+        else:
+            print("Invalid choice")
+    finally:
+        # Both tests' dispatchers share one connection pool; release it once at the end
+        await close_shared_connector()
 
     print("\n" + "="*70)
     print("✅ DEMONSTRATION COMPLETE")
@@ -5,18 +5,109 @@ Handles concurrent workflow dispatching with rate limiting and retry logic
 
 import asyncio
 import aiohttp
+import contextlib
 import json
+import random
 import time
 import logging
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, asdict
-from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json is used otherwise
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # Optional; runs-list responses are decoded whole otherwise
+    ijson = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Adaptive polling bounds for monitor_run (seconds)
+INITIAL_POLL_INTERVAL = 2.0
+IN_PROGRESS_POLL_INTERVAL = 5.0
+MAX_POLL_INTERVAL = 30.0
+# Past the caller's expected duration, polls back off exponentially up to this cap
+LATE_POLL_INTERVAL_CAP = 60.0
+# Each poll sleeps poll_interval * (1 ± POLL_JITTER) so batch monitors drift apart
+POLL_JITTER = 0.2
+
+JSON_CONTENT_TYPE = {"Content-Type": "application/json"}
+
+# Retry policy for GitHub's primary (403/429 + X-RateLimit-Remaining: 0) and
+# secondary (429 / Retry-After) rate limits
+RATE_LIMIT_MAX_RETRIES = 5
+RATE_LIMIT_BACKOFF_BASE = 1.0
+RATE_LIMIT_BACKOFF_CAP = 60.0
+RATE_LIMIT_JITTER = 1.0
+
+# A dispatched run may carry a created_at up to this many seconds before our
+# clock's POST time (clock skew); older runs with the same test_id are ignored
+DISPATCH_CLOCK_SKEW = 5
+
+
+# Connection pool shared by every dispatcher on the running event loop
+_shared_connector: Optional[aiohttp.TCPConnector] = None
+_shared_connector_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def _get_shared_connector() -> aiohttp.TCPConnector:
+    """Return the shared TCP connector, creating it for the running loop if needed"""
+    global _shared_connector, _shared_connector_loop
+
+    loop = asyncio.get_running_loop()
+    if _shared_connector is not None and _shared_connector_loop is not loop:
+        # Left open by an earlier event loop (a previous asyncio.run); close it
+        # instead of leaking it. Its sockets may belong to a loop that has
+        # already shut down, which raises once they are released.
+        with contextlib.suppress(RuntimeError):
+            await close_shared_connector()
+
+    if _shared_connector is None or _shared_connector.closed:
+        # keepalive_timeout outlasts the 60s sustained-load cadence so idle
+        # connections (and their TLS sessions) survive between bursts
+        _shared_connector = aiohttp.TCPConnector(
+            limit=100, limit_per_host=30, ttl_dns_cache=300, keepalive_timeout=75
+        )
+        _shared_connector_loop = loop
+    return _shared_connector
+
+
+async def close_shared_connector():
+    """Close the shared connector (call once, before the event loop shuts down)"""
+    global _shared_connector, _shared_connector_loop
+
+    connector = _shared_connector
+    _shared_connector = None
+    _shared_connector_loop = None
+    if connector is not None and not connector.closed:
+        await connector.close()
+
+
+def _loads(body: bytes):
+    """Decode a JSON response body, preferring orjson when installed"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _jittered(interval: float) -> float:
+    """Spread a poll interval by ±POLL_JITTER so concurrent monitors don't poll in lockstep"""
+    return interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+
+
+def _dumps(obj) -> bytes:
+    """Encode a request body to JSON bytes, preferring orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
 
 class WorkflowStatus(Enum):
     """Workflow execution status"""
@@ -28,7 +119,7 @@ class WorkflowStatus(Enum):
     TIMED_OUT = "timed_out"
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkflowDispatchRequest:
     """Request to dispatch a workflow"""
     owner: str
@@ -38,11 +129,18 @@ class WorkflowDispatchRequest:
     inputs: Optional[Dict] = None
     test_id: Optional[str] = None
 
-    def to_dict(self):
-        return asdict(self)
+    def to_payload(self) -> Dict:
+        """Build the workflow_dispatch POST body (test_id is merged into inputs)"""
+        payload = {"ref": self.ref}
+        if self.inputs or self.test_id:
+            inputs = dict(self.inputs) if self.inputs else {}
+            if self.test_id:
+                inputs["test_id"] = self.test_id
+            payload["inputs"] = inputs
+        return payload
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkflowRun:
     """Workflow run information"""
     run_id: int
@@ -86,25 +184,93 @@ class GitHubWorkflowDispatcher:
         self.rate_limiter = RateLimiter(rate_limit_per_second)
         self.semaphore = asyncio.Semaphore(max_concurrent)
         self.session = None
+        self._url_cache: Dict[Tuple[str, str], Dict[str, str]] = {}
+        # Rate limit as reported by the X-RateLimit-* headers of the last response
+        self._last_rl: Dict[str, int] = {}
         self.headers = {
             "Accept": "application/vnd.github+json",
             "Authorization": f"Bearer {token}",
             "X-GitHub-Api-Version": "2022-11-28",
         }
 
+    def _urls(self, owner: str, repo: str) -> Dict[str, str]:
+        """API URLs (and per-call templates) for a repository, built once per (owner, repo)"""
+        urls = self._url_cache.get((owner, repo))
+        if urls is None:
+            base = f"https://api.github.com/repos/{owner}/{repo}/actions"
+            urls = {
+                "dispatch": base + "/workflows/{workflow_id}/dispatches",
+                "runs_list": base + "/runs",
+                "run": base + "/runs/{run_id}",
+                "runners": base + "/runners",
+            }
+            self._url_cache[(owner, repo)] = urls
+        return urls
+
+    def _record_rate_limit(self, response: aiohttp.ClientResponse):
+        """Remember the rate limit GitHub reports on every API response"""
+        headers = response.headers
+        if "X-RateLimit-Remaining" in headers:
+            self._last_rl = {
+                "remaining": int(headers.get("X-RateLimit-Remaining", 0)),
+                "limit": int(headers.get("X-RateLimit-Limit", 0)),
+                "reset": int(headers.get("X-RateLimit-Reset", 0)),
+            }
+
+    @staticmethod
+    def _rate_limit_delay(response: aiohttp.ClientResponse, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying a rate-limited response, or None if it wasn't"""
+        if response.status not in (403, 429):
+            return None
+
+        headers = response.headers
+        backoff = min(RATE_LIMIT_BACKOFF_CAP, RATE_LIMIT_BACKOFF_BASE * 2 ** attempt)
+        jitter = random.uniform(0, RATE_LIMIT_JITTER)
+
+        if headers.get("X-RateLimit-Remaining") == "0":
+            # Primary limit: nothing will succeed before the window resets
+            reset = int(headers.get("X-RateLimit-Reset", 0))
+            return max(reset - time.time(), backoff) + jitter
+        if "Retry-After" in headers:
+            return float(headers["Retry-After"]) + jitter
+        if response.status == 429:
+            return backoff + jitter
+        return None  # A plain 403 is a permissions problem, not a rate limit
+
+    @contextlib.asynccontextmanager
+    async def _request(self, method: str, url: str, **kwargs):
+        """
+        Rate-limited request that transparently retries when GitHub reports a
+        primary or secondary rate limit, backing off exponentially with jitter
+        (or until X-RateLimit-Reset). Yields the final response.
+        """
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire()
+            async with self.session.request(method, url, **kwargs) as response:
+                self._record_rate_limit(response)
+                delay = self._rate_limit_delay(response, attempt)
+                if delay is None or attempt >= RATE_LIMIT_MAX_RETRIES:
+                    yield response
+                    return
+
+            logger.warning(f"⏳ Rate limited ({response.status}) on {url}; retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
     async def __aenter__(self):
         """Context manager entry"""
         timeout = aiohttp.ClientTimeout(total=300)  # 5 minute total timeout
-        connector = aiohttp.TCPConnector(limit=100, limit_per_host=30)
         self.session = aiohttp.ClientSession(
             headers=self.headers,
             timeout=timeout,
-            connector=connector
+            connector=await _get_shared_connector(),
+            connector_owner=False
         )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit"""
+        """Context manager exit (closes the session, keeps the shared connector)"""
         if self.session:
             await self.session.close()
 
@@ -113,26 +279,20 @@ class GitHubWorkflowDispatcher:
         Dispatch a single workflow
         Returns the run_id if successful, None otherwise
         """
-        url = f"https://api.github.com/repos/{request.owner}/{request.repo}/actions/workflows/{request.workflow_id}/dispatches"
+        url = self._urls(request.owner, request.repo)["dispatch"].format(workflow_id=request.workflow_id)
 
-        payload = {"ref": request.ref}
-        if request.inputs:
-            # Add test_id to inputs if provided
-            if request.test_id:
-                request.inputs["test_id"] = request.test_id
-            payload["inputs"] = request.inputs
-        elif request.test_id:
-            payload["inputs"] = {"test_id": request.test_id}
+        body = _dumps(request.to_payload())
 
         async with self.semaphore:
-            await self.rate_limiter.acquire()
-
+            # GitHub's fixed-width UTC format, so created_at compares as a string
+            not_before = (datetime.now(timezone.utc) - timedelta(seconds=DISPATCH_CLOCK_SKEW)
+                          ).strftime("%Y-%m-%dT%H:%M:%SZ")
             try:
-                async with self.session.post(url, json=payload) as response:
+                async with self._request("POST", url, data=body, headers=JSON_CONTENT_TYPE) as response:
                     if response.status == 204:
                         logger.info(f"✅ Dispatched workflow {request.workflow_id} for {request.owner}/{request.repo}")
                         # Get the run ID by polling recent runs
-                        run_id = await self._get_recent_run_id(request)
+                        run_id = await self._get_recent_run_id(request, not_before)
                         return run_id
                     else:
                         error_text = await response.text()
@@ -146,46 +306,72 @@ class GitHubWorkflowDispatcher:
                 logger.error(f"❌ Error dispatching workflow: {str(e)}")
                 return None
 
-    async def _get_recent_run_id(self, request: WorkflowDispatchRequest, max_attempts: int = 10) -> Optional[int]:
+    async def _get_recent_run_id(self, request: WorkflowDispatchRequest, not_before: str,
+                                 max_attempts: int = 10) -> Optional[int]:
         """
-        Poll for recently created workflow run
-        GitHub doesn't return run_id immediately, so we need to poll
+        Poll for the workflow run created by this dispatch
+        GitHub doesn't return run_id immediately, so we need to poll.
+        Runs are matched on test_id, which the test workflows expose as
+        their run-name (the run's display_title), and must have been created
+        at or after not_before so an earlier run reusing the test_id is skipped.
         """
-        url = f"https://api.github.com/repos/{request.owner}/{request.repo}/actions/runs"
+        if not request.test_id:
+            logger.warning(f"Cannot resolve run ID for {request.workflow_id}: request has no test_id")
+            return None
 
-        for attempt in range(max_attempts):
-            await asyncio.sleep(2)  # Wait before checking
-            await self.rate_limiter.acquire()
+        url = self._urls(request.owner, request.repo)["runs_list"]
 
+        for attempt in range(max_attempts):
             try:
                 params = {
                     "per_page": 10,
                     "event": "workflow_dispatch"
                 }
 
-                async with self.session.get(url, params=params) as response:
+                async with self._request("GET", url, params=params) as response:
                     if response.status == 200:
-                        data = await response.json()
-                        runs = data.get("workflow_runs", [])
-
-                        # Look for our test_id in recent runs
-                        for run in runs:
-                            # Check if this run was created recently (within last minute)
-                            created_at = datetime.fromisoformat(run["created_at"].replace("Z", "+00:00"))
-                            time_diff = (datetime.now().astimezone() - created_at).total_seconds()
-
-                            if time_diff < 60:  # Created within last minute
-                                return run["id"]
+                        run_id = await self._match_run_id(response, request.test_id, not_before)
+                        if run_id is not None:
+                            return run_id
 
             except Exception as e:
                 logger.error(f"Error getting run ID: {str(e)}")
 
+            # Not registered yet: back off before the next attempt
+            if attempt < max_attempts - 1:
+                await asyncio.sleep(min(0.5 * 2 ** attempt, 5))
+
         return None
 
+    @staticmethod
+    async def _match_run_id(response: aiohttp.ClientResponse, test_id: str,
+                            not_before: str) -> Optional[int]:
+        """
+        Find the newest run tagged with test_id and created at or after
+        not_before in a runs-list response
+        With ijson installed the body is streamed run by run and reading stops
+        at the first match; otherwise it is decoded whole.
+        """
+        def matches(run: Dict) -> bool:
+            return ((run.get("display_title") or run.get("name")) == test_id
+                    and run.get("created_at", "") >= not_before)
+
+        if ijson is not None:
+            async for run in ijson.items_async(response.content, "workflow_runs.item"):
+                if matches(run):
+                    return run["id"]
+            return None
+
+        data = _loads(await response.read())
+        return next((run["id"] for run in data.get("workflow_runs", []) if matches(run)), None)
+
     async def dispatch_batch(self, requests: List[WorkflowDispatchRequest]) -> List[Tuple[WorkflowDispatchRequest, Optional[int]]]:
         """
         Dispatch multiple workflows concurrently
-        Returns list of (request, run_id) tuples
+        Every request is started at once; the dispatcher's semaphore keeps at
+        most max_concurrent POSTs in flight, so a batch costs ~ceil(N / max_concurrent)
+        round trips rather than N.
+        Returns list of (request, run_id) tuples in request order
         """
         logger.info(f"📦 Dispatching batch of {len(requests)} workflows")
 
@@ -205,16 +391,61 @@ class GitHubWorkflowDispatcher:
 
         return dispatch_results
 
-    async def monitor_run(self, owner: str, repo: str, run_id: int, timeout_seconds: int = 3600) -> WorkflowRun:
+    async def iter_dispatch_batch(
+        self, requests: List[WorkflowDispatchRequest]
+    ) -> AsyncIterator[Tuple[WorkflowDispatchRequest, Optional[int]]]:
+        """
+        Dispatch multiple workflows concurrently, yielding (request, run_id)
+        tuples as each dispatch resolves so callers can start monitoring the
+        earliest runs while slower dispatches are still in flight
+        """
+        logger.info(f"📦 Dispatching batch of {len(requests)} workflows")
+
+        async def _dispatch(request: WorkflowDispatchRequest) -> Tuple[WorkflowDispatchRequest, Optional[int]]:
+            try:
+                return request, await self.dispatch_workflow(request)
+            except Exception as e:
+                logger.error(f"Exception for {request.workflow_id}: {str(e)}")
+                return request, None
+
+        tasks = [asyncio.create_task(_dispatch(req)) for req in requests]
+        successful = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                request, run_id = await next_done
+                if run_id is not None:
+                    successful += 1
+                yield request, run_id
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        logger.info(f"✅ Successfully dispatched {successful}/{len(requests)} workflows")
+
+    async def monitor_run(self, owner: str, repo: str, run_id: int, timeout_seconds: int = 3600,
+                          expected_seconds: Optional[float] = None) -> WorkflowRun:
         """
         Monitor a workflow run until completion or timeout
+        expected_seconds is an upper-bound estimate of how long the run should
+        take. Until then the adaptive interval applies; past it each poll
+        doubles the interval (up to LATE_POLL_INTERVAL_CAP) so overrunning
+        runs are still followed to timeout_seconds, just more cheaply.
         """
-        url = f"https://api.github.com/repos/{owner}/{repo}/actions/runs/{run_id}"
-        start_time = time.time()
+        url = self._urls(owner, repo)["run"].format(run_id=run_id)
+        # Monotonic clock: an NTP step mid-run can't skew the timeout
+        start_time = time.monotonic()
+
+        # Poll quickly while the run is young, then back off: queued runs grow
+        # the interval gradually, the in_progress transition resets it, and a
+        # run whose updated_at stalls for two polls doubles it.
+        poll_interval = INITIAL_POLL_INTERVAL
+        last_status = None
+        last_updated_at = None
+        unchanged_polls = 0
 
         while True:
-            elapsed = time.time() - start_time
-            if elapsed > timeout_seconds:
+            elapsed = time.monotonic() - start_time
+            if elapsed >= timeout_seconds:
                 logger.warning(f"⏱️ Monitoring timeout for run {run_id}")
                 return WorkflowRun(
                     run_id=run_id,
@@ -224,29 +455,27 @@ class GitHubWorkflowDispatcher:
                     created_at=datetime.now(),
                 )
 
-            await self.rate_limiter.acquire()
-
             try:
-                async with self.session.get(url) as response:
+                async with self._request("GET", url) as response:
                     if response.status == 200:
-                        data = await response.json()
+                        data = _loads(await response.read())
 
                         status = data["status"]
                         conclusion = data.get("conclusion")
 
-                        # Parse timestamps
-                        created_at = datetime.fromisoformat(data["created_at"].replace("Z", "+00:00"))
+                        # Parse timestamps (3.11+ fromisoformat accepts GitHub's trailing "Z")
+                        created_at = datetime.fromisoformat(data["created_at"])
                         started_at = None
                         completed_at = None
                         queue_time = None
                         execution_time = None
 
                         if data.get("run_started_at"):
-                            started_at = datetime.fromisoformat(data["run_started_at"].replace("Z", "+00:00"))
+                            started_at = datetime.fromisoformat(data["run_started_at"])
                             queue_time = (started_at - created_at).total_seconds()
 
                         if conclusion and data.get("updated_at"):
-                            completed_at = datetime.fromisoformat(data["updated_at"].replace("Z", "+00:00"))
+                            completed_at = datetime.fromisoformat(data["updated_at"])
                             if started_at:
                                 execution_time = (completed_at - started_at).total_seconds()
 
@@ -264,59 +493,140 @@ class GitHubWorkflowDispatcher:
                             conclusion=conclusion
                         )
 
-                        if conclusion:  # Workflow completed
+                        if conclusion or status == WorkflowStatus.COMPLETED.value:  # Workflow completed
                             logger.info(f"✅ Run {run_id} completed with conclusion: {conclusion}")
                             return workflow_run
 
-                        # Still running, wait before next poll
-                        await asyncio.sleep(10)
+                        # Still running, adapt interval before next poll
+                        if status == WorkflowStatus.IN_PROGRESS.value and last_status != status:
+                            poll_interval = IN_PROGRESS_POLL_INTERVAL
+                        elif status == WorkflowStatus.QUEUED.value:
+                            poll_interval = min(MAX_POLL_INTERVAL, poll_interval * 1.5)
+
+                        updated_at = data.get("updated_at")
+                        if updated_at == last_updated_at:
+                            unchanged_polls += 1
+                            if unchanged_polls >= 2:
+                                poll_interval = min(MAX_POLL_INTERVAL, poll_interval * 2)
+                                unchanged_polls = 0
+                        else:
+                            unchanged_polls = 0
+
+                        last_status = status
+                        last_updated_at = updated_at
+
+                        if expected_seconds is not None and elapsed > expected_seconds:
+                            poll_interval = min(LATE_POLL_INTERVAL_CAP, poll_interval * 2)
+
+                # Never sleep past the timeout
+                remaining = timeout_seconds - (time.monotonic() - start_time)
+                await asyncio.sleep(max(0.0, min(_jittered(poll_interval), remaining)))
 
             except Exception as e:
                 logger.error(f"Error monitoring run {run_id}: {str(e)}")
-                await asyncio.sleep(10)
+                await asyncio.sleep(_jittered(poll_interval))
 
-    async def monitor_batch(self, runs: List[Tuple[str, str, int]], timeout_seconds: int = 3600) -> List[WorkflowRun]:
+    async def _monitor_window(
+        self, runs: List[Tuple[str, str, int]], timeout_seconds: int, monitor_concurrency: int
+    ) -> AsyncIterator[Tuple[int, WorkflowRun]]:
+        """
+        Monitor runs through a sliding window of at most monitor_concurrency
+        tasks, yielding (index into runs, WorkflowRun) as each one finishes
+        """
+        pending = set()
+        task_index: Dict[asyncio.Task, int] = {}
+        indexed_runs = iter(enumerate(runs))
+
+        try:
+            while True:
+                # Top the window back up before waiting
+                for index, (owner, repo, run_id) in indexed_runs:
+                    task = asyncio.create_task(self.monitor_run(owner, repo, run_id, timeout_seconds))
+                    task_index[task] = index
+                    pending.add(task)
+                    if len(pending) >= monitor_concurrency:
+                        break
+
+                if not pending:
+                    return
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        logger.error(f"Monitoring exception: {str(task.exception())}")
+                    else:
+                        yield task_index[task], task.result()
+                    del task_index[task]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def monitor_batch(
+        self, runs: List[Tuple[str, str, int]], timeout_seconds: int = 3600, monitor_concurrency: int = 50
+    ) -> List[WorkflowRun]:
         """
-        Monitor multiple workflow runs concurrently
+        Monitor multiple workflow runs with bounded concurrency
         runs: List of (owner, repo, run_id) tuples
+        Returns the completed runs in the same order as runs
         """
-        logger.info(f"👀 Monitoring {len(runs)} workflow runs")
+        logger.info(f"👀 Monitoring {len(runs)} workflow runs (window: {monitor_concurrency})")
 
-        tasks = [
-            self.monitor_run(owner, repo, run_id, timeout_seconds)
-            for owner, repo, run_id in runs
-        ]
+        results: List[Optional[WorkflowRun]] = [None] * len(runs)
+        async for index, workflow_run in self._monitor_window(runs, timeout_seconds, monitor_concurrency):
+            results[index] = workflow_run
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return [workflow_run for workflow_run in results if workflow_run is not None]
 
-        workflow_runs = []
-        for result in results:
-            if isinstance(result, Exception):
-                logger.error(f"Monitoring exception: {str(result)}")
-            else:
-                workflow_runs.append(result)
+    async def count_busy_runners(self, owner: str, repo: str) -> Optional[int]:
+        """
+        Count the repository's self-hosted runners that are busy with a job
+        Returns None if the runner list could not be fetched (listing runners
+        needs a token with admin access to the repository)
+        """
+        url = self._urls(owner, repo)["runners"]
 
-        return workflow_runs
+        try:
+            async with self._request("GET", url, params={"per_page": 100}) as response:
+                if response.status != 200:
+                    return None
+                data = _loads(await response.read())
+        except Exception as e:
+            logger.error(f"Error listing runners: {str(e)}")
+            return None
+
+        return sum(1 for runner in data.get("runners", []) if runner.get("busy"))
 
     async def get_rate_limit(self) -> Dict:
-        """Get current API rate limit status"""
-        url = "https://api.github.com/rate_limit"
+        """
+        Get current API rate limit status
+        Uses the X-RateLimit-* headers of the most recent response; the
+        /rate_limit endpoint is only queried before any other call was made
+        """
+        if not self._last_rl:
+            await self._fetch_rate_limit()
 
-        await self.rate_limiter.acquire()
+        if self._last_rl:
+            logger.info(f"📊 API Rate Limit: {self._last_rl['remaining']}/{self._last_rl['limit']} "
+                      f"(resets at {datetime.fromtimestamp(self._last_rl['reset'])})")
+        return dict(self._last_rl)
+
+    async def _fetch_rate_limit(self):
+        """Query the /rate_limit endpoint to seed the cached rate limit"""
+        url = "https://api.github.com/rate_limit"
 
         try:
-            async with self.session.get(url) as response:
+            async with self._request("GET", url) as response:
                 if response.status == 200:
-                    data = await response.json()
-                    core = data["rate"]["core"]
-                    logger.info(f"📊 API Rate Limit: {core['remaining']}/{core['limit']} "
-                              f"(resets at {datetime.fromtimestamp(core['reset'])})")
-                    return core
+                    data = _loads(await response.read())
+                    core = data["resources"]["core"]
+                    self._last_rl = {
+                        "remaining": core["remaining"],
+                        "limit": core["limit"],
+                        "reset": core["reset"],
+                    }
         except Exception as e:
             logger.error(f"Error getting rate limit: {str(e)}")
 
-        return {}
-
 
 async def example_batch_dispatch():
     """Example of batch workflow dispatching"""
@@ -344,19 +654,17 @@ async def example_batch_dispatch():
         # Check rate limits
         await dispatcher.get_rate_limit()
 
-        # Dispatch workflows
-        dispatch_results = await dispatcher.dispatch_batch(requests)
+        # Dispatch workflows, handing each run to a monitor as soon as it resolves
+        monitor_tasks = []
+        async for req, run_id in dispatcher.iter_dispatch_batch(requests):
+            if run_id is not None:
+                monitor_tasks.append(asyncio.create_task(
+                    dispatcher.monitor_run(req.owner, req.repo, run_id)
+                ))
 
-        # Filter successful dispatches
-        runs_to_monitor = [
-            (req.owner, req.repo, run_id)
-            for req, run_id in dispatch_results
-            if run_id is not None
-        ]
-
-        # Monitor all runs
-        if runs_to_monitor:
-            workflow_runs = await dispatcher.monitor_batch(runs_to_monitor)
+        # Wait for all monitors
+        if monitor_tasks:
+            workflow_runs = await asyncio.gather(*monitor_tasks)
 
             # Print results
             for run in workflow_runs:
@@ -364,7 +672,20 @@ async def example_batch_dispatch():
                       f"Queue: {run.queue_time_seconds:.1f}s, "
                       f"Execution: {run.execution_time_seconds:.1f}s" if run.execution_time_seconds else "")
 
+    await close_shared_connector()
+
+
+def install_uvloop() -> bool:
+    """Use uvloop as the asyncio event loop when it is installed"""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    uvloop.install()
+    return True
+
 
 if __name__ == "__main__":
     # Run example
+    install_uvloop()
     asyncio.run(example_batch_dispatch())
\ No newline at end of file
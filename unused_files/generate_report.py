@@ -3,11 +3,49 @@
 Generate human-readable reports from test analysis.
 Usage: python generate_report.py [--format text|markdown]
 """
+import os
 import json
+import math
+import bisect
+import fnmatch
 import argparse
+import functools
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json is used otherwise
+    orjson = None
+
+
+def _as_minutes(value):
+    """Return a duration as float minutes, accepting strings like '3.2 minutes'."""
+    return float(value.split()[0]) if isinstance(value, str) else float(value)
+
+
+# Per-metric (thresholds, labels): a value maps to labels[bisect_right(thresholds, value)].
+# Utilization's 85 and 95 bounds are inclusive on the lower bucket, hence nextafter.
+_BUCKETS = {
+    'queue_time': ((0.5, 2, 5), ("✅ EXCELLENT", "✅ GOOD", "⚠️  MODERATE", "❌ POOR")),
+    'total_time': ((5, 10), ("✅ EXCELLENT", "⚠️  FAIR", "❌ POOR")),
+    'queue_impact': ((10, 30), ("✅ MINIMAL", "⚠️  MODERATE", "❌ HIGH")),
+    'utilization': (
+        (50, 70, math.nextafter(85, math.inf), math.nextafter(95, math.inf)),
+        ("⚠️  LOW", "✅ GOOD", "✅ OPTIMAL", "✅ GOOD", "❌ OVERLOAD")
+    ),
+}
+
+
+@functools.lru_cache(maxsize=512)
+def _status_indicator(value, metric_type):
+    """Return status indicator for a numeric metric value."""
+    buckets = _BUCKETS.get(metric_type)
+    if buckets is None:
+        return ""
+    thresholds, labels = buckets
+    return labels[bisect.bisect_right(thresholds, value)]
+
 
 class ReportGenerator:
     """Generate human-readable reports from analysis data."""
@@ -15,143 +53,160 @@ class ReportGenerator:
     def __init__(self, analysis_file: str = None):
         """Load the most recent analysis if no file specified."""
         if analysis_file:
-            self.data = self._load_analysis(analysis_file)
+            self.data = self._parse_analysis(analysis_file)
         else:
             # Find most recent analysis
             analysis_dir = Path('test_results/analysis')
             if analysis_dir.exists():
-                files = sorted(analysis_dir.glob('*_analysis_*.json'))
-                if files:
-                    self.data = self._load_analysis(files[-1])
+                # Single scan for the newest file by mtime; no list or sort
+                with os.scandir(analysis_dir) as entries:
+                    latest = max(
+                        (e for e in entries
+                         if fnmatch.fnmatch(e.name, '*_analysis_*.json') and e.is_file()),
+                        key=lambda e: e.stat().st_mtime_ns,
+                        default=None
+                    )
+                if latest:
+                    self.data = self._parse_analysis(latest.path)
                 else:
                     raise FileNotFoundError("No analysis files found")
             else:
                 raise FileNotFoundError("Analysis directory not found")
 
-    def _load_analysis(self, filepath):
-        """Load analysis JSON file."""
-        with open(filepath) as f:
+    @staticmethod
+    def _parse_analysis(path):
+        """Parse analysis JSON file."""
+        if orjson is not None:
+            with open(path, 'rb') as f:
+                return orjson.loads(f.read())
+        with open(path) as f:
             return json.load(f)
 
-    def generate_text_report(self):
-        """Generate plain text report."""
+    def generate_text_report(self, now=None):
+        """Generate plain text report, stamped with now (default: current time)."""
+        now = now or datetime.now()
         insights = self.data['insights']
         queue = self.data['queue_analysis']
         execution = self.data['execution_analysis']
         utilization = self.data['utilization_analysis']
         metrics = self.data['metrics']
 
-        report = []
-        report.append("=" * 70)
-        report.append(f"  PERFORMANCE TEST ANALYSIS REPORT")
-        report.append(f"  Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        report.append("=" * 70)
-        report.append("")
-
-        # Executive Summary
-        report.append("EXECUTIVE SUMMARY")
-        report.append("-" * 40)
-        report.append(f"Test Type:           {self.data.get('test_type', 'Performance').upper()}")
-        report.append(f"Workflows Analyzed:  {metrics['job_count']}")
-        report.append(f"Overall Status:      {self._get_overall_status()}")
-        report.append("")
-
-        # Key Metrics Table
-        report.append("KEY METRICS")
-        report.append("-" * 40)
-        report.append(f"{'Metric':<25} {'Value':<20} {'Status':<15}")
-        report.append("-" * 60)
-
-        avg_total = insights['user_experience']['avg_wait_time']
-        avg_queue = queue['metrics']['average']
-        avg_exec = execution['metrics']['average']
+        # Nested dicts and values shared by several sections, looked up once
+        qm = queue['metrics']
+        em = execution['metrics']
+        ue = insights['user_experience']
+        jc = metrics['job_count']
+        avg_total = ue['avg_wait_time']
+        avg_total_min = _as_minutes(avg_total)
+        avg_queue = qm['average']
+        avg_exec = em['average']
         queue_impact = insights['summary']['queue_impact_pct']
         util = utilization['metrics']['average']
+        jobs_queued = qm['jobs_queued']
+        rule = "-" * 40
+
+        header = f"""{"=" * 70}
+  PERFORMANCE TEST ANALYSIS REPORT
+  Generated: {now.strftime('%Y-%m-%d %H:%M:%S')}
+{"=" * 70}
+"""
+
+        summary = f"""EXECUTIVE SUMMARY
+{rule}
+Test Type:           {self.data.get('test_type', 'Performance').upper()}
+Workflows Analyzed:  {jc}
+Overall Status:      {self.overall_status}
+"""
+
+        queue_value = f"{avg_queue:.1f} minutes"
+        exec_value = f"{avg_exec:.1f} minutes"
+        impact_value = f"{queue_impact:.0f}% of total"
+        util_value = f"{util:.1f}%"
+        key_metrics = f"""KEY METRICS
+{rule}
+{'Metric':<25} {'Value':<20} {'Status':<15}
+{"-" * 60}
+{'Average Total Time':<25} {avg_total:<20} {_status_indicator(avg_total_min, 'total_time'):<15}
+{'Average Queue Time':<25} {queue_value:<20} {_status_indicator(avg_queue, 'queue_time'):<15}
+{'Average Execution Time':<25} {exec_value:<20} {_status_indicator(avg_exec, 'exec_time'):<15}
+{'Queue Impact':<25} {impact_value:<20} {_status_indicator(queue_impact, 'queue_impact'):<15}
+{'Runner Utilization':<25} {util_value:<20} {_status_indicator(util, 'utilization'):<15}
+"""
+
+        queue_section = f"""QUEUE ANALYSIS
+{rule}
+Health Status:       {queue['health']}
+Pattern:             {queue['growth_pattern']}
+Average Queue:       {avg_queue:.1f} minutes
+Maximum Queue:       {qm['maximum']:.1f} minutes
+Jobs Queued:         {jobs_queued}/{jc} ({jobs_queued/jc*100:.0f}%)
+
+Interpretation:
+  {queue['interpretation']}
+"""
+
+        execution_section = f"""EXECUTION TIME ANALYSIS
+{rule}
+Consistency:         {execution['consistency']}
+Average Execution:   {avg_exec:.1f} minutes
+Variation (CV):      {em['coefficient_variation']:.0f}%
+Expected Range:      {execution['range_compliance']['expected_range']}
+Within Range:        {execution['range_compliance']['within_range_pct']:.0f}%
+"""
+
+        experience_section = f"""USER EXPERIENCE
+{rule}
+Rating:              {ue['rating']}
+Description:         {ue['description']}
+Average Wait:        {avg_total}
+"""
+
+        # Clean up Unicode characters for plain text
+        findings = "".join(
+            f"  • {finding.replace('⚠️', '[!]').replace('🔍', '[>]')}\n"
+            for finding in insights['key_findings']
+        )
+        findings_section = f"""KEY FINDINGS
+{rule}
+{findings}"""
+
+        # Combine recommendations from different analyses, then action items
+        all_recs = (
+            [('Queue', rec) for rec in queue.get('recommendations', [])]
+            + [('Execution', rec) for rec in execution.get('recommendations', [])]
+            + [('Utilization', rec) for rec in utilization.get('recommendations', [])]
+            + [('Action', action.replace('🔴', '[HIGH]').replace('🟡', '[MED]').replace('✅', '[OK]'))
+               for action in insights.get('action_items', [])]
+        )
+        recs = "".join(f"  [{category}] {rec}\n" for category, rec in all_recs)
+        recommendations_section = f"""RECOMMENDATIONS
+{rule}
+{recs}"""
 
-        report.append(f"{'Average Total Time':<25} {avg_total:<20} {self._status_indicator(avg_total, 'total_time'):<15}")
-        report.append(f"{'Average Queue Time':<25} {f'{avg_queue:.1f} minutes':<20} {self._status_indicator(avg_queue, 'queue_time'):<15}")
-        report.append(f"{'Average Execution Time':<25} {f'{avg_exec:.1f} minutes':<20} {self._status_indicator(avg_exec, 'exec_time'):<15}")
-        report.append(f"{'Queue Impact':<25} {f'{queue_impact:.0f}% of total':<20} {self._status_indicator(queue_impact, 'queue_impact'):<15}")
-        report.append(f"{'Runner Utilization':<25} {f'{util:.1f}%':<20} {self._status_indicator(util, 'utilization'):<15}")
-        report.append("")
-
-        # Queue Analysis
-        report.append("QUEUE ANALYSIS")
-        report.append("-" * 40)
-        report.append(f"Health Status:       {queue['health']}")
-        report.append(f"Pattern:             {queue['growth_pattern']}")
-        report.append(f"Average Queue:       {queue['metrics']['average']:.1f} minutes")
-        report.append(f"Maximum Queue:       {queue['metrics']['maximum']:.1f} minutes")
-        report.append(f"Jobs Queued:         {queue['metrics']['jobs_queued']}/{metrics['job_count']} ({queue['metrics']['jobs_queued']/metrics['job_count']*100:.0f}%)")
-        report.append("")
-        report.append("Interpretation:")
-        report.append(f"  {queue['interpretation']}")
-        report.append("")
-
-        # Execution Analysis
-        report.append("EXECUTION TIME ANALYSIS")
-        report.append("-" * 40)
-        report.append(f"Consistency:         {execution['consistency']}")
-        report.append(f"Average Execution:   {execution['metrics']['average']:.1f} minutes")
-        report.append(f"Variation (CV):      {execution['metrics']['coefficient_variation']:.0f}%")
-        report.append(f"Expected Range:      {execution['range_compliance']['expected_range']}")
-        report.append(f"Within Range:        {execution['range_compliance']['within_range_pct']:.0f}%")
-        report.append("")
-
-        # User Experience
-        report.append("USER EXPERIENCE")
-        report.append("-" * 40)
-        report.append(f"Rating:              {insights['user_experience']['rating']}")
-        report.append(f"Description:         {insights['user_experience']['description']}")
-        report.append(f"Average Wait:        {insights['user_experience']['avg_wait_time']}")
-        report.append("")
-
-        # Key Findings
-        report.append("KEY FINDINGS")
-        report.append("-" * 40)
-        for finding in insights['key_findings']:
-            # Clean up Unicode characters for plain text
-            clean_finding = finding.replace('⚠️', '[!]').replace('🔍', '[>]')
-            report.append(f"  • {clean_finding}")
-        report.append("")
-
-        # Recommendations
-        report.append("RECOMMENDATIONS")
-        report.append("-" * 40)
-        all_recs = []
-
-        # Combine recommendations from different analyses
-        for rec in queue.get('recommendations', []):
-            all_recs.append(('Queue', rec))
-        for rec in execution.get('recommendations', []):
-            all_recs.append(('Execution', rec))
-        for rec in utilization.get('recommendations', []):
-            all_recs.append(('Utilization', rec))
-
-        # Also add action items
-        for action in insights.get('action_items', []):
-            clean_action = action.replace('🔴', '[HIGH]').replace('🟡', '[MED]').replace('✅', '[OK]')
-            all_recs.append(('Action', clean_action))
-
-        for category, rec in all_recs:
-            report.append(f"  [{category}] {rec}")
-        report.append("")
-
-        # System Details
-        report.append("SYSTEM DETAILS")
-        report.append("-" * 40)
         capacity = insights['capacity']
-        report.append(f"Current Runners:     {capacity['current_runners']}")
-        report.append(f"Current Rate:        {capacity['current_rate']}")
-        report.append(f"Sustainable Rate:    {capacity['sustainable_rate']}")
-        report.append(f"System Health:       {insights['system_health']}")
-        report.append("")
+        system_section = f"""SYSTEM DETAILS
+{rule}
+Current Runners:     {capacity['current_runners']}
+Current Rate:        {capacity['current_rate']}
+Sustainable Rate:    {capacity['sustainable_rate']}
+System Health:       {insights['system_health']}
+"""
 
-        report.append("=" * 70)
-        report.append("END OF REPORT")
-        report.append("")
+        footer = f"""{"=" * 70}
+END OF REPORT
+"""
 
-        return "\n".join(report)
+        sections = [
+            header, summary, key_metrics, queue_section, execution_section,
+            experience_section, findings_section, recommendations_section,
+            system_section, footer,
+        ]
+        return "\n".join(sections)
+
+    @functools.cached_property
+    def overall_status(self):
+        """Overall status, computed once per loaded analysis."""
+        return self._get_overall_status()
 
     def _get_overall_status(self):
         """Determine overall status from metrics."""
@@ -165,46 +220,9 @@ class ReportGenerator:
         else:
             return "⚠️  MODERATE ISSUES"
 
-    def _status_indicator(self, value, metric_type):
-        """Return status indicator for different metrics."""
-        if metric_type == 'queue_time':
-            value_num = float(str(value).split()[0]) if isinstance(value, str) else value
-            if value_num < 0.5:
-                return "✅ EXCELLENT"
-            elif value_num < 2:
-                return "✅ GOOD"
-            elif value_num < 5:
-                return "⚠️  MODERATE"
-            else:
-                return "❌ POOR"
-        elif metric_type == 'total_time':
-            value_num = float(str(value).split()[0]) if isinstance(value, str) else value
-            if value_num < 5:
-                return "✅ EXCELLENT"
-            elif value_num < 10:
-                return "⚠️  FAIR"
-            else:
-                return "❌ POOR"
-        elif metric_type == 'queue_impact':
-            if value < 10:
-                return "✅ MINIMAL"
-            elif value < 30:
-                return "⚠️  MODERATE"
-            else:
-                return "❌ HIGH"
-        elif metric_type == 'utilization':
-            if 70 <= value <= 85:
-                return "✅ OPTIMAL"
-            elif value > 95:
-                return "❌ OVERLOAD"
-            elif value < 50:
-                return "⚠️  LOW"
-            else:
-                return "✅ GOOD"
-        return ""
-
-    def generate_markdown_report(self):
-        """Generate Markdown report."""
+    def generate_markdown_report(self, now=None):
+        """Generate Markdown report, stamped with now (default: current time)."""
+        now = now or datetime.now()
         # Similar to text but with Markdown formatting
         insights = self.data['insights']
         queue = self.data['queue_analysis']
@@ -212,44 +230,45 @@ class ReportGenerator:
         utilization = self.data['utilization_analysis']
         metrics = self.data['metrics']
 
-        md = []
-        md.append("# Performance Test Analysis Report")
-        md.append(f"**Generated**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        md.append("")
-
-        md.append("## Executive Summary")
-        md.append(f"- **Test Type**: {self.data.get('test_type', 'Performance').upper()}")
-        md.append(f"- **Workflows Analyzed**: {metrics['job_count']}")
-        md.append(f"- **Overall Status**: {self._get_overall_status()}")
-        md.append("")
-
-        md.append("## Key Metrics")
-        md.append("")
-        md.append("| Metric | Value | Status |")
-        md.append("|--------|-------|--------|")
-
+        jc = metrics['job_count']
         avg_total = insights['user_experience']['avg_wait_time']
+        avg_total_min = _as_minutes(avg_total)
         avg_queue = queue['metrics']['average']
         avg_exec = execution['metrics']['average']
         queue_impact = insights['summary']['queue_impact_pct']
         util = utilization['metrics']['average']
 
-        md.append(f"| Average Total Time | {avg_total} | {self._status_indicator(avg_total, 'total_time')} |")
-        md.append(f"| Average Queue Time | {avg_queue:.1f} minutes | {self._status_indicator(avg_queue, 'queue_time')} |")
-        md.append(f"| Average Execution Time | {avg_exec:.1f} minutes | {self._status_indicator(avg_exec, 'exec_time')} |")
-        md.append(f"| Queue Impact | {queue_impact:.0f}% of total | {self._status_indicator(queue_impact, 'queue_impact')} |")
-        md.append(f"| Runner Utilization | {util:.1f}% | {self._status_indicator(util, 'utilization')} |")
-        md.append("")
+        header = f"""# Performance Test Analysis Report
+**Generated**: {now.strftime('%Y-%m-%d %H:%M:%S')}
+"""
+
+        summary = f"""## Executive Summary
+- **Test Type**: {self.data.get('test_type', 'Performance').upper()}
+- **Workflows Analyzed**: {jc}
+- **Overall Status**: {self.overall_status}
+"""
+
+        key_metrics = f"""## Key Metrics
+
+| Metric | Value | Status |
+|--------|-------|--------|
+| Average Total Time | {avg_total} | {_status_indicator(avg_total_min, 'total_time')} |
+| Average Queue Time | {avg_queue:.1f} minutes | {_status_indicator(avg_queue, 'queue_time')} |
+| Average Execution Time | {avg_exec:.1f} minutes | {_status_indicator(avg_exec, 'exec_time')} |
+| Queue Impact | {queue_impact:.0f}% of total | {_status_indicator(queue_impact, 'queue_impact')} |
+| Runner Utilization | {util:.1f}% | {_status_indicator(util, 'utilization')} |
+"""
 
-        return "\n".join(md)
+        return "\n".join([header, summary, key_metrics])
 
-    def save_report(self, format='text'):
-        """Save report to file."""
+    def save_report(self, format='text', now=None):
+        """Save report to file; now stamps both the body and the file name."""
+        now = now or datetime.now()
         if format == 'text':
-            content = self.generate_text_report()
+            content = self.generate_text_report(now)
             extension = '.txt'
         elif format == 'markdown':
-            content = self.generate_markdown_report()
+            content = self.generate_markdown_report(now)
             extension = '.md'
         else:
             raise ValueError(f"Unknown format: {format}")
@@ -257,12 +276,11 @@ class ReportGenerator:
         output_dir = Path('test_results/reports')
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
         filename = f"analysis_report_{timestamp}{extension}"
         filepath = output_dir / filename
 
-        with open(filepath, 'w') as f:
-            f.write(content)
+        filepath.write_bytes(content.encode('utf-8'))
 
         return filepath
 
@@ -279,16 +297,17 @@ def main():
 
     try:
         generator = ReportGenerator(args.analysis_file)
+        now = datetime.now()
 
         if args.format == 'text':
-            report = generator.generate_text_report()
+            report = generator.generate_text_report(now)
         else:
-            report = generator.generate_markdown_report()
+            report = generator.generate_markdown_report(now)
 
         print(report)
 
         if args.save:
-            filepath = generator.save_report(args.format)
+            filepath = generator.save_report(args.format, now)
             print(f"\n📄 Report saved to: {filepath}")
 
     except FileNotFoundError as e:
@@ -3,17 +3,24 @@ Metrics Collector for GitHub Runner Performance Testing
 Collects, stores, and analyzes workflow execution metrics
 """
 
-import json
+import math
+import pickle
 import asyncio
-import statistics
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, asdict, field, fields
 from datetime import datetime, timedelta
 from enum import Enum
 import aiohttp
 import logging
 from pathlib import Path
 
+from dispatcher import _dumps, _loads
+
+
+# Returned by MetricsCollector._fetch_run when GitHub answers 304 Not Modified
+_NOT_MODIFIED = object()
+
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -53,24 +60,41 @@ class WorkflowMetrics:
     repository: Optional[str] = None
 
     def to_dict(self) -> Dict:
-        """Convert to dictionary for JSON serialization"""
-        data = asdict(self)
+        """
+        Convert to dictionary for JSON serialization
+        Shallow copy: job_metrics is already a list of plain dicts, so it is
+        shared rather than deep-copied as dataclasses.asdict would do
+        """
+        data = self.__dict__.copy()
         # Convert datetime objects to ISO strings
-        for key in ['created_at', 'started_at', 'completed_at']:
-            if data[key] and isinstance(data[key], datetime):
-                data[key] = data[key].isoformat()
+        for key in ('created_at', 'started_at', 'completed_at'):
+            value = data[key]
+            if value is not None:
+                data[key] = value.isoformat()
         return data
 
     @classmethod
     def from_dict(cls, data: Dict) -> 'WorkflowMetrics':
-        """Create from dictionary"""
+        """
+        Create from dictionary
+        Records written by to_dict carry exactly the dataclass fields, so those
+        skip the generated __init__ and are installed straight into __dict__.
+        """
         # Convert ISO strings back to datetime objects
-        for key in ['created_at', 'started_at', 'completed_at']:
-            if data.get(key) and isinstance(data[key], str):
-                data[key] = datetime.fromisoformat(data[key])
+        for key in ('created_at', 'started_at', 'completed_at'):
+            value = data.get(key)
+            if value and isinstance(value, str):
+                data[key] = datetime.fromisoformat(value)
+        if data.keys() == _WORKFLOW_METRICS_FIELDS:
+            metric = cls.__new__(cls)
+            metric.__dict__.update(data)
+            return metric
         return cls(**data)
 
 
+_WORKFLOW_METRICS_FIELDS = frozenset(f.name for f in fields(WorkflowMetrics))
+
+
 @dataclass
 class AggregatedMetrics:
     """Aggregated metrics across multiple workflow runs"""
@@ -118,68 +142,190 @@ class AggregatedMetrics:
         return data
 
 
+@dataclass
+class RunningStats:
+    """
+    Online counters for the non-percentile aggregate statistics
+    Updated one metric at a time so totals, means and min/max never need the
+    full timing arrays; only complete metrics (total_time set) feed the timings
+    """
+    total_runs: int = 0
+    successful_runs: int = 0
+    complete_runs: int = 0
+    total_jobs: int = 0
+
+    queue_n: int = 0
+    queue_sum: float = 0.0
+    queue_min: float = math.inf
+    queue_max: float = -math.inf
+
+    exec_n: int = 0
+    exec_sum: float = 0.0
+    exec_min: float = math.inf
+    exec_max: float = -math.inf
+
+    total_sum: float = 0.0
+
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+
+    def add(self, metric: WorkflowMetrics):
+        """Fold one metric into the running totals"""
+        self.total_runs += 1
+        if metric.success:
+            self.successful_runs += 1
+        if metric.total_time is None:
+            return
+
+        self.complete_runs += 1
+        self.total_jobs += metric.total_jobs
+        self.total_sum += metric.total_time
+
+        q = metric.queue_time
+        if q is not None:
+            self.queue_n += 1
+            self.queue_sum += q
+            if q < self.queue_min:
+                self.queue_min = q
+            if q > self.queue_max:
+                self.queue_max = q
+
+        e = metric.execution_time
+        if e is not None:
+            self.exec_n += 1
+            self.exec_sum += e
+            if e < self.exec_min:
+                self.exec_min = e
+            if e > self.exec_max:
+                self.exec_max = e
+
+        if metric.created_at and (self.start_time is None or metric.created_at < self.start_time):
+            self.start_time = metric.created_at
+        if metric.completed_at and (self.end_time is None or metric.completed_at > self.end_time):
+            self.end_time = metric.completed_at
+
+
 class MetricsStorage:
-    """JSON-based metrics storage (can be upgraded to database later)"""
+    """
+    Newline-delimited JSON metrics storage (can be upgraded to database later)
+    Each metric is appended to metrics_<test_id>_<timestamp>.ndjson as soon as
+    it is added; a small <name>.header.json sidecar carries test_id/timestamp.
+    The file is only created with the first metric. Use as a context manager
+    (or call close()) so the open file is flushed and closed.
+    """
 
     def __init__(self, storage_path: str = "./metrics"):
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(exist_ok=True)
         self.current_test_id = None
-        self.metrics_buffer = []
+        self.current_file: Optional[Path] = None
+        self.metric_count = 0
+        self.running = RunningStats()
+        self._file = None
 
     def set_test_id(self, test_id: str):
-        """Set current test ID for this session"""
+        """Set current test ID for this session and start a new metrics file"""
+        self.close()
         self.current_test_id = test_id
-        self.metrics_buffer = []
+        self.metric_count = 0
+        self.running = RunningStats()
 
-    def add_metric(self, metric: WorkflowMetrics):
-        """Add a metric to the buffer"""
-        self.metrics_buffer.append(metric)
+    def __enter__(self):
+        return self
 
-    def save_metrics(self, filename: Optional[str] = None):
-        """Save metrics to JSON file"""
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _open(self, filename: Optional[str] = None):
+        """Open the session's NDJSON file for append and write its header"""
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"metrics_{self.current_test_id}_{timestamp}.json"
-
-        filepath = self.storage_path / filename
+            filename = f"metrics_{self.current_test_id}_{timestamp}.ndjson"
 
-        data = {
+        self.current_file = self.storage_path / filename
+        header = {
             "test_id": self.current_test_id,
             "timestamp": datetime.now().isoformat(),
-            "metrics": [m.to_dict() for m in self.metrics_buffer]
         }
+        self._header_path(self.current_file).write_bytes(_dumps(header))
+
+        self._file = open(self.current_file, 'ab')
+
+    @staticmethod
+    def _header_path(filepath: Path) -> Path:
+        """Sidecar header file for a metrics file"""
+        return filepath.with_suffix(".header.json")
 
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+    def add_metric(self, metric: WorkflowMetrics):
+        """Append a metric to the session's metrics file"""
+        if self._file is None:
+            self._open()
+        self._file.write(_dumps(metric.to_dict()) + b"\n")
+        self.metric_count += 1
+        self.running.add(metric)
 
-        logger.info(f"Saved {len(self.metrics_buffer)} metrics to {filepath}")
-        return filepath
+    def save_metrics(self, filename: Optional[str] = None):
+        """
+        Flush streamed metrics to disk
+        If filename is given the current file (and its header) is renamed to it
+        and later metrics keep appending there.
+        """
+        if self._file is None:
+            self._open(filename)
+        else:
+            self._file.flush()
+            if filename and filename != self.current_file.name:
+                self._file.close()
+                target = self.storage_path / filename
+                self._header_path(self.current_file).rename(self._header_path(target))
+                self.current_file = self.current_file.rename(target)
+                self._file = open(self.current_file, 'ab')
+
+        logger.info(f"Saved {self.metric_count} metrics to {self.current_file}")
+        return self.current_file
+
+    def close(self):
+        """Close the current metrics file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
     def load_metrics(self, filename: str) -> List[WorkflowMetrics]:
-        """Load metrics from JSON file"""
+        """Load metrics from an NDJSON file (or a legacy single-document JSON file)"""
         filepath = self.storage_path / filename
 
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        # Streamed files keep their header sidecar whatever they were renamed to
+        from_dict = WorkflowMetrics.from_dict
+        if filepath.suffix == ".ndjson" or self._header_path(filepath).exists():
+            with open(filepath, 'rb') as f:
+                return [from_dict(_loads(line)) for line in f if line.strip()]
 
-        metrics = []
-        for metric_data in data.get('metrics', []):
-            metrics.append(WorkflowMetrics.from_dict(metric_data))
+        with open(filepath, 'rb') as f:
+            data = _loads(f.read())
 
-        return metrics
+        return [from_dict(metric_data) for metric_data in data.get('metrics', [])]
 
     def get_all_test_files(self) -> List[Path]:
         """Get all test metric files"""
-        return list(self.storage_path.glob("metrics_*.json"))
+        files = list(self.storage_path.glob("metrics_*.ndjson"))
+        files.extend(
+            path for path in self.storage_path.glob("metrics_*.json")
+            if not path.name.endswith(".header.json")
+        )
+        return files
 
 
 class MetricsCollector:
     """Collects metrics from GitHub API"""
 
-    def __init__(self, github_token: str, storage: Optional[MetricsStorage] = None):
+    def __init__(self, github_token: str, storage: Optional[MetricsStorage] = None, max_concurrency: int = 32):
         self.github_token = github_token
         self.storage = storage or MetricsStorage()
+        # Caps in-flight run collections so large batches don't stampede the API
+        self.max_concurrency = max_concurrency
+        self._sem = asyncio.Semaphore(max_concurrency)
+        # Completed runs are immutable: keep their ETag + parsed metrics on disk
+        self.cache_dir = self.storage.storage_path / "cache"
         self.headers = {
             "Accept": "application/vnd.github+json",
             "Authorization": f"Bearer {github_token}",
@@ -189,7 +335,13 @@ class MetricsCollector:
 
     async def __aenter__(self):
         """Context manager entry"""
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=16,
+            ttl_dns_cache=300,
+            keepalive_timeout=60
+        )
+        self.session = aiohttp.ClientSession(headers=self.headers, connector=connector)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -199,72 +351,135 @@ class MetricsCollector:
 
     async def collect_run_metrics(self, owner: str, repo: str, run_id: int) -> WorkflowMetrics:
         """Collect metrics for a single workflow run"""
-        url = f"https://api.github.com/repos/{owner}/{repo}/actions/runs/{run_id}"
+        async with self._sem:
+            return await self._collect_run_metrics(owner, repo, run_id)
 
+    async def _collect_run_metrics(self, owner: str, repo: str, run_id: int) -> WorkflowMetrics:
+        """Fetch and build the metrics for one run (caller holds the semaphore)"""
         try:
-            async with self.session.get(url) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to get run {run_id}: {response.status}")
+            cached = self._load_cached_run(owner, repo, run_id)
+            if cached:
+                # Revalidate first; a 304 means the cached metrics are still current
+                etag, cached_metrics = cached
+                data, new_etag = await self._fetch_run(owner, repo, run_id, etag)
+                if data is _NOT_MODIFIED:
+                    self.storage.add_metric(cached_metrics)
+                    return cached_metrics
+                if data is None:
+                    return None
+                job_metrics = await self.collect_job_metrics(owner, repo, run_id)
+            else:
+                # The run and its jobs are independent requests, so fetch them together
+                (data, new_etag), job_metrics = await asyncio.gather(
+                    self._fetch_run(owner, repo, run_id),
+                    self.collect_job_metrics(owner, repo, run_id)
+                )
+                if data is None:
                     return None
 
-                data = await response.json()
-
-                # Parse timestamps
-                created_at = datetime.fromisoformat(data["created_at"].replace("Z", "+00:00"))
-                started_at = None
-                completed_at = None
-
-                if data.get("run_started_at"):
-                    started_at = datetime.fromisoformat(data["run_started_at"].replace("Z", "+00:00"))
-
-                if data.get("updated_at") and data.get("conclusion"):
-                    completed_at = datetime.fromisoformat(data["updated_at"].replace("Z", "+00:00"))
-
-                # Calculate timing metrics
-                queue_time = None
-                execution_time = None
-                total_time = None
+            # Parse timestamps (3.11+ fromisoformat accepts GitHub's trailing "Z")
+            created_at = datetime.fromisoformat(data["created_at"])
+            started_at = None
+            completed_at = None
+
+            if data.get("run_started_at"):
+                started_at = datetime.fromisoformat(data["run_started_at"])
+
+            if data.get("updated_at") and data.get("conclusion"):
+                completed_at = datetime.fromisoformat(data["updated_at"])
+
+            # Calculate timing metrics
+            queue_time = None
+            execution_time = None
+            total_time = None
+
+            if started_at:
+                queue_time = (started_at - created_at).total_seconds()
+
+            if started_at and completed_at:
+                execution_time = (completed_at - started_at).total_seconds()
+                total_time = (completed_at - created_at).total_seconds()
+
+            metrics = WorkflowMetrics(
+                run_id=run_id,
+                workflow_id=data.get("path", "").split("/")[-1],
+                test_id=data.get("name", f"run_{run_id}"),
+                status=data["status"],
+                conclusion=data.get("conclusion"),
+                success=data.get("conclusion") == "success",
+                created_at=created_at,
+                started_at=started_at,
+                completed_at=completed_at,
+                queue_time=queue_time,
+                execution_time=execution_time,
+                total_time=total_time,
+                html_url=data["html_url"],
+                repository=f"{owner}/{repo}",
+                job_metrics=job_metrics,
+                total_jobs=len(job_metrics),
+                successful_jobs=sum(1 for j in job_metrics if j.get("conclusion") == "success"),
+                failed_jobs=sum(1 for j in job_metrics if j.get("conclusion") == "failure")
+            )
+
+            # Store metric
+            self.storage.add_metric(metrics)
+
+            if new_etag and metrics.conclusion is not None:
+                self._save_cached_run(owner, repo, run_id, new_etag, metrics)
+
+            return metrics
 
-                if started_at:
-                    queue_time = (started_at - created_at).total_seconds()
+        except Exception as e:
+            logger.error(f"Error collecting metrics for run {run_id}: {str(e)}")
+            return None
 
-                if started_at and completed_at:
-                    execution_time = (completed_at - started_at).total_seconds()
-                    total_time = (completed_at - created_at).total_seconds()
+    async def _fetch_run(self, owner: str, repo: str, run_id: int,
+                         etag: Optional[str] = None) -> Tuple[Any, Optional[str]]:
+        """
+        Fetch the raw run payload and its ETag
+        Returns (_NOT_MODIFIED, etag) on a 304 and (None, None) on any other failure
+        """
+        url = f"https://api.github.com/repos/{owner}/{repo}/actions/runs/{run_id}"
+        headers = {"If-None-Match": etag} if etag else None
 
-                # Get job metrics
-                job_metrics = await self.collect_job_metrics(owner, repo, run_id)
+        async with self.session.get(url, headers=headers) as response:
+            if response.status == 304:
+                return _NOT_MODIFIED, etag
+            if response.status != 200:
+                logger.error(f"Failed to get run {run_id}: {response.status}")
+                return None, None
 
-                metrics = WorkflowMetrics(
-                    run_id=run_id,
-                    workflow_id=data.get("path", "").split("/")[-1],
-                    test_id=data.get("name", f"run_{run_id}"),
-                    status=data["status"],
-                    conclusion=data.get("conclusion"),
-                    success=data.get("conclusion") == "success",
-                    created_at=created_at,
-                    started_at=started_at,
-                    completed_at=completed_at,
-                    queue_time=queue_time,
-                    execution_time=execution_time,
-                    total_time=total_time,
-                    html_url=data["html_url"],
-                    repository=f"{owner}/{repo}",
-                    job_metrics=job_metrics,
-                    total_jobs=len(job_metrics),
-                    successful_jobs=sum(1 for j in job_metrics if j.get("conclusion") == "success"),
-                    failed_jobs=sum(1 for j in job_metrics if j.get("conclusion") == "failure")
-                )
+            return _loads(await response.read()), response.headers.get("ETag")
 
-                # Store metric
-                self.storage.add_metric(metrics)
-
-                return metrics
+    def _cache_paths(self, owner: str, repo: str, run_id: int) -> Tuple[Path, Path]:
+        """ETag and pickle paths for a cached run"""
+        stem = f"{owner}_{repo}_{run_id}"
+        return self.cache_dir / f"{stem}.etag", self.cache_dir / f"{stem}.pkl"
 
+    def _load_cached_run(self, owner: str, repo: str, run_id: int) -> Optional[Tuple[str, WorkflowMetrics]]:
+        """Return (etag, metrics) for a previously completed run, if cached"""
+        etag_path, pkl_path = self._cache_paths(owner, repo, run_id)
+        try:
+            etag = etag_path.read_text()
+            with open(pkl_path, 'rb') as f:
+                return etag, pickle.load(f)
+        except FileNotFoundError:
+            return None
         except Exception as e:
-            logger.error(f"Error collecting metrics for run {run_id}: {str(e)}")
+            logger.warning(f"Ignoring unreadable cache for run {run_id}: {str(e)}")
             return None
 
+    def _save_cached_run(self, owner: str, repo: str, run_id: int, etag: str, metrics: WorkflowMetrics):
+        """Persist a completed run's ETag and metrics (best effort)"""
+        etag_path, pkl_path = self._cache_paths(owner, repo, run_id)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Pickle first so an ETag never points at a missing payload
+            pkl_path.write_bytes(pickle.dumps(metrics, protocol=pickle.HIGHEST_PROTOCOL))
+            etag_path.write_text(etag)
+        except OSError as e:
+            logger.warning(f"Could not cache run {run_id}: {str(e)}")
+
     async def collect_job_metrics(self, owner: str, repo: str, run_id: int) -> List[Dict]:
         """Collect metrics for all jobs in a workflow run"""
         url = f"https://api.github.com/repos/{owner}/{repo}/actions/runs/{run_id}/jobs"
@@ -274,7 +489,7 @@ class MetricsCollector:
                 if response.status != 200:
                     return []
 
-                data = await response.json()
+                data = _loads(await response.read())
                 jobs = []
 
                 for job in data.get("jobs", []):
@@ -282,10 +497,10 @@ class MetricsCollector:
                     job_completed = None
 
                     if job.get("started_at"):
-                        job_started = datetime.fromisoformat(job["started_at"].replace("Z", "+00:00"))
+                        job_started = datetime.fromisoformat(job["started_at"])
 
                     if job.get("completed_at"):
-                        job_completed = datetime.fromisoformat(job["completed_at"].replace("Z", "+00:00"))
+                        job_completed = datetime.fromisoformat(job["completed_at"])
 
                     job_duration = None
                     if job_started and job_completed:
@@ -310,19 +525,25 @@ class MetricsCollector:
             return []
 
     async def collect_batch_metrics(self, runs: List[tuple]) -> List[WorkflowMetrics]:
-        """Collect metrics for multiple workflow runs"""
-        tasks = []
-        for owner, repo, run_id in runs:
-            tasks.append(self.collect_run_metrics(owner, repo, run_id))
-
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        """
+        Collect metrics for multiple workflow runs
+        At most max_concurrency runs are fetched at once; results are gathered
+        in completion order
+        """
+        tasks = [
+            asyncio.create_task(self.collect_run_metrics(owner, repo, run_id))
+            for owner, repo, run_id in runs
+        ]
 
         metrics = []
-        for result in results:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                result = await next_done
+            except Exception as e:
+                logger.error(f"Error in batch collection: {str(e)}")
+                continue
             if isinstance(result, WorkflowMetrics):
                 metrics.append(result)
-            elif isinstance(result, Exception):
-                logger.error(f"Error in batch collection: {str(result)}")
 
         return metrics
 
@@ -339,65 +560,90 @@ class MetricsAnalyzer:
         index = int(len(sorted_values) * percentile / 100)
         return sorted_values[min(index, len(sorted_values) - 1)]
 
+    @staticmethod
+    def calculate_percentiles(values: List[float], percentiles: Tuple[float, ...]) -> Tuple[float, ...]:
+        """Calculate several percentiles of values with a single sort"""
+        if not values:
+            return (0.0,) * len(percentiles)
+        sorted_values = sorted(values)
+        n = len(sorted_values)
+        return tuple(sorted_values[min(int(n * p / 100), n - 1)] for p in percentiles)
+
     @classmethod
-    def aggregate_metrics(cls, metrics: List[WorkflowMetrics], test_id: str, test_type: str) -> AggregatedMetrics:
-        """Aggregate multiple workflow metrics"""
+    def aggregate_metrics(cls, metrics: List[WorkflowMetrics], test_id: str, test_type: str,
+                          running: Optional[RunningStats] = None) -> AggregatedMetrics:
+        """
+        Aggregate multiple workflow metrics
+        Pass running (e.g. MetricsStorage.running) when it was fed exactly these
+        metrics; its totals are used as-is and metrics is only scanned for the
+        percentile inputs.
+        """
         if not metrics:
             raise ValueError("No metrics to aggregate")
 
-        # Filter out incomplete metrics
-        complete_metrics = [m for m in metrics if m.total_time is not None]
-
-        if not complete_metrics:
+        stats = RunningStats() if running is None else None
+
+        # Percentiles still need the individual values; everything else is online
+        queue_times = []
+        exec_times = []
+        for m in metrics:
+            if stats is not None:
+                stats.add(m)
+            if m.total_time is None:
+                continue
+            if m.queue_time is not None:
+                queue_times.append(m.queue_time)
+            if m.execution_time is not None:
+                exec_times.append(m.execution_time)
+        stats = stats or running
+
+        if not stats.complete_runs:
             raise ValueError("No complete metrics to aggregate")
 
-        # Extract timing values
-        queue_times = [m.queue_time for m in complete_metrics if m.queue_time is not None]
-        exec_times = [m.execution_time for m in complete_metrics if m.execution_time is not None]
-        total_times = [m.total_time for m in complete_metrics]
+        p50_queue, p95_queue, p99_queue = cls.calculate_percentiles(queue_times, (50, 95, 99))
+        p50_exec, p95_exec, p99_exec = cls.calculate_percentiles(exec_times, (50, 95, 99))
 
         # Calculate time window
-        start_times = [m.created_at for m in complete_metrics if m.created_at]
-        end_times = [m.completed_at for m in complete_metrics if m.completed_at]
-
-        start_time = min(start_times) if start_times else datetime.now()
-        end_time = max(end_times) if end_times else datetime.now()
+        start_time = stats.start_time or datetime.now()
+        end_time = stats.end_time or datetime.now()
         duration = (end_time - start_time).total_seconds()
 
         # Calculate throughput
-        workflows_per_minute = (len(complete_metrics) / duration) * 60 if duration > 0 else 0
-        total_jobs = sum(m.total_jobs for m in complete_metrics)
-        jobs_per_minute = (total_jobs / duration) * 60 if duration > 0 else 0
+        workflows_per_minute = (stats.complete_runs / duration) * 60 if duration > 0 else 0
+        jobs_per_minute = (stats.total_jobs / duration) * 60 if duration > 0 else 0
+
+        total_runs = stats.total_runs
+        success_count = stats.successful_runs
 
         return AggregatedMetrics(
             test_id=test_id,
             test_type=test_type,
-            total_runs=len(metrics),
-            successful_runs=sum(1 for m in metrics if m.success),
-            failed_runs=sum(1 for m in metrics if not m.success),
+            total_runs=total_runs,
+            successful_runs=success_count,
+            failed_runs=total_runs - success_count,
 
             # Queue time statistics
-            avg_queue_time=statistics.mean(queue_times) if queue_times else 0,
-            min_queue_time=min(queue_times) if queue_times else 0,
-            max_queue_time=max(queue_times) if queue_times else 0,
-            p50_queue_time=cls.calculate_percentile(queue_times, 50),
-            p95_queue_time=cls.calculate_percentile(queue_times, 95),
-            p99_queue_time=cls.calculate_percentile(queue_times, 99),
+            avg_queue_time=stats.queue_sum / stats.queue_n if stats.queue_n else 0,
+            min_queue_time=stats.queue_min if stats.queue_n else 0,
+            max_queue_time=stats.queue_max if stats.queue_n else 0,
+            p50_queue_time=p50_queue,
+            p95_queue_time=p95_queue,
+            p99_queue_time=p99_queue,
 
             # Execution time statistics
-            avg_execution_time=statistics.mean(exec_times) if exec_times else 0,
-            min_execution_time=min(exec_times) if exec_times else 0,
-            max_execution_time=max(exec_times) if exec_times else 0,
-            p50_execution_time=cls.calculate_percentile(exec_times, 50),
-            p95_execution_time=cls.calculate_percentile(exec_times, 95),
-            p99_execution_time=cls.calculate_percentile(exec_times, 99),
+            avg_execution_time=stats.exec_sum / stats.exec_n if stats.exec_n else 0,
+            min_execution_time=stats.exec_min if stats.exec_n else 0,
+            max_execution_time=stats.exec_max if stats.exec_n else 0,
+            p50_execution_time=p50_exec,
+            p95_execution_time=p95_exec,
+            p99_execution_time=p99_exec,
 
             # Total time
-            avg_total_time=statistics.mean(total_times),
+            avg_total_time=stats.total_sum / stats.complete_runs,
 
             # Success metrics
-            success_rate=(sum(1 for m in metrics if m.success) / len(metrics)) * 100,
-            failure_rate=(sum(1 for m in metrics if not m.success) / len(metrics)) * 100,
+            success_rate=(success_count / total_runs) * 100,
+            failure_rate=((total_runs - success_count) / total_runs) * 100,
 
             # Throughput
             workflows_per_minute=workflows_per_minute,
@@ -5,23 +5,32 @@ Tests basic workflow dispatch and metrics collection with your repository
 """
 
 import asyncio
+import contextlib
 import os
 import sys
 from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional, Tuple
 import logging
 
 # Add parent directory to path to import our modules
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from dispatcher import GitHubWorkflowDispatcher, WorkflowDispatchRequest
+from dispatcher import GitHubWorkflowDispatcher, WorkflowDispatchRequest, close_shared_connector, _dumps, _loads
 from metrics_collector import MetricsCollector, MetricsStorage, MetricsAnalyzer
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Pre-flight responses rarely change; keep their ETag + body for conditional GETs
+ETAG_CACHE_DIR = Path.home() / ".cache" / "runner-harness"
 
-async def quick_test():
-    """Run a quick test with 1-2 workflows to verify everything works"""
+
+async def quick_test(dispatcher: Optional[GitHubWorkflowDispatcher] = None):
+    """
+    Run a quick test with 1-2 workflows to verify everything works
+    Pass an open dispatcher to reuse its session; otherwise one is created
+    """
 
     # Check for GitHub token
     token = os.getenv('GITHUB_TOKEN')
@@ -40,7 +49,12 @@ async def quick_test():
 
     test_id = f"quick_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
-    async with GitHubWorkflowDispatcher(token, max_concurrent=2, rate_limit_per_second=5) as dispatcher:
+    if dispatcher is None:
+        dispatcher_ctx = GitHubWorkflowDispatcher(token, max_concurrent=2, rate_limit_per_second=5)
+    else:
+        dispatcher_ctx = contextlib.nullcontext(dispatcher)
+
+    async with dispatcher_ctx as dispatcher:
         # Check API rate limit first
         print("📊 Checking GitHub API rate limit...")
         rate_info = await dispatcher.get_rate_limit()
@@ -85,7 +99,8 @@ async def quick_test():
             "Devopulence",
             "test-workflows",
             run_id,
-            timeout_seconds=300  # 5 minute timeout for quick test
+            timeout_seconds=300,  # 5 minute timeout for quick test
+            expected_seconds=90   # simple workflows normally finish well within this
         )
 
         # Display results
@@ -116,71 +131,77 @@ async def quick_test():
             return False
 
 
-async def test_repository_access():
-    """Test if we can access the repository"""
-    import aiohttp
-
-    token = os.getenv('GITHUB_TOKEN')
-    if not token:
+async def conditional_get(session, url: str, cache_path: Path) -> Tuple[int, Any]:
+    """
+    GET url with If-None-Match from the cached ETag
+    Returns (status, data); a 304 is reported as 200 with the cached body
+    """
+    cached = None
+    try:
+        raw = cache_path.read_bytes()
+        cached = _loads(raw)
+    except (OSError, ValueError):
+        pass
+
+    headers = {"If-None-Match": cached["etag"]} if cached else None
+    async with session.get(url, headers=headers) as response:
+        if response.status == 304 and cached:
+            return 200, cached["body"]
+        if response.status != 200:
+            return response.status, None
+
+        data = _loads(await response.read())
+        etag = response.headers.get("ETag")
+
+    if etag:
+        entry = {"etag": etag, "body": data}
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_bytes(_dumps(entry))
+        except OSError as e:
+            logger.debug(f"Could not write ETag cache {cache_path}: {e}")
+    return 200, data
+
+
+async def test_repository_access(session):
+    """Test if we can access the repository (session: an authenticated aiohttp session)"""
+    # Check repository
+    url = "https://api.github.com/repos/Devopulence/test-workflows"
+    status, data = await conditional_get(session, url, ETAG_CACHE_DIR / "repo.json")
+    if status == 200:
+        print(f"✅ Repository found: {data['full_name']}")
+        print(f"   Description: {data.get('description', 'No description')}")
+        return True
+    elif status == 404:
+        print("❌ Repository not found or not accessible")
+        print("   Run: bash setup_workflows.sh to create it")
+        return False
+    else:
+        print(f"❌ Unexpected status: {status}")
         return False
-
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-
-    async with aiohttp.ClientSession(headers=headers) as session:
-        # Check repository
-        url = "https://api.github.com/repos/Devopulence/test-workflows"
-        async with session.get(url) as response:
-            if response.status == 200:
-                data = await response.json()
-                print(f"✅ Repository found: {data['full_name']}")
-                print(f"   Description: {data.get('description', 'No description')}")
-                return True
-            elif response.status == 404:
-                print("❌ Repository not found or not accessible")
-                print("   Run: bash setup_workflows.sh to create it")
-                return False
-            else:
-                print(f"❌ Unexpected status: {response.status}")
-                return False
 
 
-async def check_workflows():
-    """Check if workflows are present in the repository"""
-    import aiohttp
+async def check_workflows(session):
+    """Check if workflows are present in the repository (session: an authenticated aiohttp session)"""
+    # Check for workflows
+    url = "https://api.github.com/repos/Devopulence/test-workflows/actions/workflows"
+    status, data = await conditional_get(session, url, ETAG_CACHE_DIR / "workflows.json")
+    if status == 200:
+        workflows = data.get('workflows', [])
 
-    token = os.getenv('GITHUB_TOKEN')
-    if not token:
+        if workflows:
+            print(f"✅ Found {len(workflows)} workflow(s):")
+            for wf in workflows:
+                print(f"   - {wf['name']} ({wf['path']})")
+            return True
+        else:
+            print("⚠️  No workflows found in repository")
+            print("   Run: bash setup_workflows.sh to upload them")
+            return False
+    else:
+        print(f"❌ Could not check workflows: {status}")
         return False
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-
-    async with aiohttp.ClientSession(headers=headers) as session:
-        # Check for workflows
-        url = "https://api.github.com/repos/Devopulence/test-workflows/actions/workflows"
-        async with session.get(url) as response:
-            if response.status == 200:
-                data = await response.json()
-                workflows = data.get('workflows', [])
-
-                if workflows:
-                    print(f"✅ Found {len(workflows)} workflow(s):")
-                    for wf in workflows:
-                        print(f"   - {wf['name']} ({wf['path']})")
-                    return True
-                else:
-                    print("⚠️  No workflows found in repository")
-                    print("   Run: bash setup_workflows.sh to upload them")
-                    return False
-            else:
-                print(f"❌ Could not check workflows: {response.status}")
-                return False
-
 
 async def main():
     """Main test function"""
@@ -196,19 +217,36 @@ async def main():
     else:
         print("✅ GitHub token found")
 
-    # Check repository access
-    if not await test_repository_access():
-        sys.exit(1)
-
-    # Check workflows
-    if not await check_workflows():
-        print("\n⚠️  No workflows found. Would you like to set them up?")
-        print("Run: bash setup_workflows.sh")
-        sys.exit(1)
-
-    # Run quick test
-    print("\n" + "-" * 40)
-    success = await quick_test()
+    # One dispatcher (and its pooled connection) serves the pre-flight checks and the test
+    try:
+        async with GitHubWorkflowDispatcher(
+            os.getenv('GITHUB_TOKEN'), max_concurrent=2, rate_limit_per_second=5
+        ) as dispatcher:
+            # Repository and workflow checks are independent, so run them together
+            repo_ok, workflows_ok = await asyncio.gather(
+                test_repository_access(dispatcher.session),
+                check_workflows(dispatcher.session),
+                return_exceptions=True
+            )
+            for result in (repo_ok, workflows_ok):
+                if isinstance(result, Exception):
+                    print(f"❌ Pre-flight check failed: {str(result)}")
+
+            # Check repository access
+            if repo_ok is not True:
+                sys.exit(1)
+
+            # Check workflows
+            if workflows_ok is not True:
+                print("\n⚠️  No workflows found. Would you like to set them up?")
+                print("Run: bash setup_workflows.sh")
+                sys.exit(1)
+
+            # Run quick test
+            print("\n" + "-" * 40)
+            success = await quick_test(dispatcher)
+    finally:
+        await close_shared_connector()
 
     if success:
         sys.exit(0)
@@ -5,8 +5,17 @@ This tests your workflows as if you only had 4 runners available
 """
 
 import asyncio
+import bisect
+import contextlib
+import dataclasses
+import io
+import itertools
+import math
+import random
 import time
 from datetime import datetime
+from types import MappingProxyType
+from typing import Iterable
 import os
 import sys
 import logging
@@ -14,13 +23,46 @@ import logging
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from dispatcher import GitHubWorkflowDispatcher, WorkflowDispatchRequest
+from dispatcher import GitHubWorkflowDispatcher, WorkflowDispatchRequest, close_shared_connector
 from metrics_collector import MetricsCollector, MetricsStorage, MetricsAnalyzer
 from config_manager import ConfigManager
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Queue-stress pacing: brief pause between steps unless the API quota runs low
+MIN_COOL_DOWN_SECONDS = 5
+RATE_LIMIT_SAFETY_MARGIN = 100
+
+# Start-time spread (s) -> verdict: < 10 high, < 30 moderate, otherwise low concurrency
+CONCURRENCY_SPREAD_THRESHOLDS = (10, 30)
+CONCURRENCY_VERDICTS = (
+    "   ✅ High concurrency: All started within {spread:.1f}s",
+    "   ⚠️  Moderate concurrency: Spread over {spread:.1f}s",
+    "   ❌ Low concurrency: Spread over {spread:.1f}s",
+)
+
+# Queue time (s) buckets: immediate execution below 10s, queued from 10s
+QUEUE_TIME_THRESHOLDS = (10,)
+
+# Shared, read-only inputs for every simple_test.yml dispatch
+# (to_payload copies them before adding test_id)
+SIMPLE_INPUTS = MappingProxyType({"complexity": "simple"})
+
+
+@contextlib.contextmanager
+def _buffered_stdout():
+    """
+    Collect everything printed in the block and write it to stdout in one call
+    (also when the block raises, so a partial report is still shown)
+    """
+    buf = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buf):
+            yield
+    finally:
+        sys.stdout.write(buf.getvalue())
+
 
 class FourRunnerTestSuite:
     """Test suite specifically for 4-runner capacity scenarios"""
@@ -30,6 +72,16 @@ class FourRunnerTestSuite:
         self.metrics_storage = MetricsStorage()
         self.max_runners = 4  # OpenShift constraint
 
+    def _request_prototype(self):
+        """Template request for simple_test.yml; callers replace() in the test_id"""
+        return WorkflowDispatchRequest(
+            owner=self.config.github.owner,
+            repo=self.config.github.repo,
+            workflow_id="simple_test.yml",
+            ref="main",
+            inputs=SIMPLE_INPUTS
+        )
+
     async def test_exact_capacity(self):
         """Test with exactly 4 workflows (matching runner count)"""
         print("\n" + "="*60)
@@ -46,34 +98,18 @@ class FourRunnerTestSuite:
             max_concurrent=4  # Limit to 4 concurrent
         ) as dispatcher:
             # Create exactly 4 workflow requests
+            proto = self._request_prototype()
             requests = []
             for i in range(4):
-                requests.append(WorkflowDispatchRequest(
-                    owner=self.config.github.owner,
-                    repo=self.config.github.repo,
-                    workflow_id="simple_test.yml",
-                    ref="main",
-                    test_id=f"{test_id}_{i}",
-                    inputs={"complexity": "simple"}
-                ))
+                requests.append(dataclasses.replace(proto, test_id=f"{test_id}_{i}"))
 
             print(f"Dispatching 4 workflows simultaneously...")
             start_time = time.time()
 
-            # Dispatch all 4 at once
-            dispatch_results = await dispatcher.dispatch_batch(requests)
-
-            # Monitor results
-            runs_to_monitor = [
-                (req.owner, req.repo, run_id)
-                for req, run_id in dispatch_results
-                if run_id is not None
-            ]
-
-            if runs_to_monitor:
-                print(f"Monitoring {len(runs_to_monitor)} workflows...")
-                metrics = await dispatcher.monitor_batch(runs_to_monitor)
+            # Dispatch all 4 at once; each run is monitored as soon as it resolves
+            metrics = await self._dispatch_and_monitor(dispatcher, requests)
 
+            if metrics:
                 # Analyze timing
                 self._analyze_concurrent_execution(metrics, 4)
 
@@ -95,34 +131,18 @@ class FourRunnerTestSuite:
             max_concurrent=4  # Simulate 4 runner limit
         ) as dispatcher:
             # Create 8 workflow requests
+            proto = self._request_prototype()
             requests = []
             for i in range(8):
-                requests.append(WorkflowDispatchRequest(
-                    owner=self.config.github.owner,
-                    repo=self.config.github.repo,
-                    workflow_id="simple_test.yml",
-                    ref="main",
-                    test_id=f"{test_id}_{i}",
-                    inputs={"complexity": "simple"}
-                ))
+                requests.append(dataclasses.replace(proto, test_id=f"{test_id}_{i}"))
 
             print(f"Dispatching 8 workflows (2x capacity)...")
             start_time = time.time()
 
-            # Dispatch all 8
-            dispatch_results = await dispatcher.dispatch_batch(requests)
-
-            # Monitor results
-            runs_to_monitor = [
-                (req.owner, req.repo, run_id)
-                for req, run_id in dispatch_results
-                if run_id is not None
-            ]
-
-            if runs_to_monitor:
-                print(f"Monitoring {len(runs_to_monitor)} workflows...")
-                metrics = await dispatcher.monitor_batch(runs_to_monitor)
+            # Dispatch all 8; each run is monitored as soon as it resolves
+            metrics = await self._dispatch_and_monitor(dispatcher, requests)
 
+            if metrics:
                 # Analyze queueing behavior
                 self._analyze_queue_behavior(metrics, 4)
 
@@ -144,40 +164,50 @@ class FourRunnerTestSuite:
             max_concurrent=4
         ) as dispatcher:
             all_runs = []
-            workflow_counter = 0
-
-            end_time = time.time() + (duration_minutes * 60)
-
-            while time.time() < end_time:
-                minute_start = time.time()
-
-                # Dispatch exactly 4 workflows
-                batch_requests = []
-                for i in range(4):
-                    batch_requests.append(WorkflowDispatchRequest(
-                        owner=self.config.github.owner,
-                        repo=self.config.github.repo,
-                        workflow_id="simple_test.yml",
-                        ref="main",
-                        test_id=f"{test_id}_{workflow_counter}",
-                        inputs={"complexity": "simple"}
-                    ))
-                    workflow_counter += 1
-
-                print(f"Minute {int((time.time() - (end_time - duration_minutes * 60)) / 60) + 1}: "
-                      f"Dispatching 4 workflows...")
-
-                # Dispatch this minute's batch
-                dispatch_results = await dispatcher.dispatch_batch(batch_requests)
+            proto = self._request_prototype()
+            tid_prefix = f"{test_id}_"
+            loop = asyncio.get_running_loop()
 
+            def record(dispatch_results):
                 for req, run_id in dispatch_results:
                     if run_id:
                         all_runs.append((req.owner, req.repo, run_id))
 
-                # Wait for the rest of the minute
-                elapsed = time.time() - minute_start
-                if elapsed < 60:
-                    await asyncio.sleep(60 - elapsed)
+            async def producer():
+                workflow_counter = 0
+                minute = 0
+                # Monotonic schedule: each minute's deadline is fixed up front so drift can't compound
+                next_tick = loop.time() + 60
+
+                while True:
+                    minute += 1
+
+                    # Dispatch exactly 4 workflows
+                    batch_requests = []
+                    for i in range(4):
+                        batch_requests.append(dataclasses.replace(proto, test_id=tid_prefix + str(workflow_counter)))
+                        workflow_counter += 1
+
+                    print(f"Minute {minute}: Dispatching 4 workflows...")
+
+                    # Shielded so a deadline or Ctrl-C mid-dispatch still records the runs already sent
+                    pending = asyncio.ensure_future(dispatcher.dispatch_batch(batch_requests))
+                    try:
+                        record(await asyncio.shield(pending))
+                    except asyncio.CancelledError:
+                        record(await pending)
+                        raise
+
+                    # Wait for the next minute boundary, jittered so bursts don't line up
+                    # with GitHub's secondary rate limiter
+                    await asyncio.sleep(max(0, next_tick - loop.time() + random.uniform(-1.5, 1.5)))
+                    next_tick += 60
+
+            # The deadline cancels the producer wherever it is, usually mid-sleep
+            try:
+                await asyncio.wait_for(asyncio.create_task(producer()), timeout=duration_minutes * 60)
+            except asyncio.TimeoutError:
+                pass
 
             # Monitor all runs
             print(f"\nMonitoring {len(all_runs)} total workflows...")
@@ -198,138 +228,189 @@ class FourRunnerTestSuite:
 
         test_id = f"4runner_stress_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
-        for batch_size in [4, 6, 8, 10, 12]:
-            print(f"\n>>> Testing {batch_size} concurrent workflows...")
-
-            async with GitHubWorkflowDispatcher(
-                token=self.config.github.token,
-                max_concurrent=4
-            ) as dispatcher:
-                requests = []
-                for i in range(batch_size):
-                    requests.append(WorkflowDispatchRequest(
-                        owner=self.config.github.owner,
-                        repo=self.config.github.repo,
-                        workflow_id="simple_test.yml",
-                        ref="main",
-                        test_id=f"{test_id}_batch{batch_size}_{i}",
-                        inputs={"complexity": "simple"}
-                    ))
-
-                # Dispatch batch
-                dispatch_results = await dispatcher.dispatch_batch(requests)
-
-                runs_to_monitor = [
-                    (req.owner, req.repo, run_id)
-                    for req, run_id in dispatch_results
-                    if run_id is not None
-                ]
-
-                if runs_to_monitor:
-                    metrics = await dispatcher.monitor_batch(runs_to_monitor)
-                    self._analyze_batch_metrics(metrics, batch_size, 4)
-
-                # Cool down between tests
-                await asyncio.sleep(30)
+        # One dispatcher for every step keeps the connection pool warm
+        async with GitHubWorkflowDispatcher(
+            token=self.config.github.token,
+            max_concurrent=4
+        ) as dispatcher:
+            for batch_size in [4, 6, 8, 10, 12]:
+                print(f"\n>>> Testing {batch_size} concurrent workflows...")
 
-        print("-"*60)
+                await self._run_one_batch(dispatcher, test_id, batch_size)
 
-    def _analyze_concurrent_execution(self, metrics, expected_concurrent):
-        """Analyze if workflows ran concurrently"""
-        if not metrics:
-            return
+                # Cool down between tests, only as long as the API quota requires
+                await asyncio.sleep(await self._cool_down_seconds(dispatcher))
 
-        # Extract start times
-        start_times = []
+        print("-"*60)
+
+    async def _cool_down_seconds(self, dispatcher):
+        """
+        Pause needed before the next stress step: MIN_COOL_DOWN_SECONDS while the
+        quota is healthy, or until the rate-limit window resets when fewer than
+        RATE_LIMIT_SAFETY_MARGIN requests remain (read from the last response's headers)
+        """
+        rate = await dispatcher.get_rate_limit()
+        if rate and rate.get('remaining', 0) < RATE_LIMIT_SAFETY_MARGIN:
+            return max(MIN_COOL_DOWN_SECONDS, rate.get('reset', 0) - time.time())
+        return MIN_COOL_DOWN_SECONDS
+
+    async def _run_one_batch(self, dispatcher, test_id, batch_size):
+        """Dispatch and monitor one queue-stress step on an open dispatcher"""
+        proto = self._request_prototype()
+        requests = []
+        for i in range(batch_size):
+            requests.append(dataclasses.replace(proto, test_id=f"{test_id}_batch{batch_size}_{i}"))
+
+        # Dispatch batch; each run is monitored as soon as it resolves
+        metrics = await self._dispatch_and_monitor(dispatcher, requests)
+
+        if metrics:
+            self._analyze_batch_metrics(metrics, batch_size, 4)
+
+    async def _dispatch_and_monitor(self, dispatcher, requests):
+        """
+        Dispatch every request and chain each successful dispatch straight into
+        monitoring, so wall time is max(dispatch_i + monitor_i) rather than
+        max(dispatch) + max(monitor). Returns finished runs in completion order.
+        """
+        metrics = []
+
+        async def dispatch_then_monitor(request):
+            run_id = await dispatcher.dispatch_workflow(request)
+            if run_id is None:
+                return
+            logger.info(f"Monitoring run {run_id}...")
+            metrics.append(await dispatcher.monitor_run(request.owner, request.repo, run_id))
+
+        async with asyncio.TaskGroup() as tg:
+            for request in requests:
+                tg.create_task(dispatch_then_monitor(request))
+
+        return metrics
+
+    @_buffered_stdout()
+    def _analyze_concurrent_execution(self, metrics: Iterable, expected_concurrent):
+        """Analyze if workflows ran concurrently (metrics may be any single-pass iterable)"""
+        count = 0
+        earliest = math.inf
+        latest = -math.inf
         for m in metrics:
+            count += 1
             if m.started_at:
-                start_times.append(m.started_at.timestamp())
+                ts = m.started_at.timestamp()
+                if ts < earliest:
+                    earliest = ts
+                if ts > latest:
+                    latest = ts
 
-        if start_times:
-            start_times.sort()
-            spread = start_times[-1] - start_times[0]
+        if latest >= earliest:
+            spread = latest - earliest
 
             print(f"\n📊 Concurrency Analysis:")
-            print(f"   Workflows: {len(metrics)}")
+            print(f"   Workflows: {count}")
             print(f"   Start time spread: {spread:.1f} seconds")
 
-            if spread < 10:
-                print(f"   ✅ High concurrency: All started within {spread:.1f}s")
-            elif spread < 30:
-                print(f"   ⚠️  Moderate concurrency: Spread over {spread:.1f}s")
-            else:
-                print(f"   ❌ Low concurrency: Spread over {spread:.1f}s")
-
-    def _analyze_queue_behavior(self, metrics, runner_limit):
-        """Analyze queueing when over capacity"""
-        if not metrics:
+            verdict = CONCURRENCY_VERDICTS[bisect.bisect_right(CONCURRENCY_SPREAD_THRESHOLDS, spread)]
+            print(verdict.format(spread=spread))
+
+    @_buffered_stdout()
+    def _analyze_queue_behavior(self, metrics: Iterable, runner_limit):
+        """Analyze queueing when over capacity (metrics may be any single-pass iterable)"""
+        # Analyze queue times, bucketing immediate vs queued in the same pass
+        total = 0
+        total_queue = 0.0
+        max_queue = 0.0
+        buckets = [0] * (len(QUEUE_TIME_THRESHOLDS) + 1)
+        for m in metrics:
+            total += 1
+            queue_time = m.queue_time_seconds
+            if not queue_time:
+                continue
+            total_queue += queue_time
+            if queue_time > max_queue:
+                max_queue = queue_time
+            buckets[bisect.bisect_right(QUEUE_TIME_THRESHOLDS, queue_time)] += 1
+        immediate, queued = buckets
+
+        if not total:
             return
 
-        # Sort by start time
-        sorted_metrics = sorted(metrics, key=lambda m: m.started_at.timestamp() if m.started_at else 0)
-
         print(f"\n📊 Queue Behavior Analysis:")
-        print(f"   Total workflows: {len(metrics)}")
+        print(f"   Total workflows: {total}")
         print(f"   Runner limit: {runner_limit}")
 
-        # Analyze queue times
-        queue_times = [m.queue_time_seconds for m in metrics if m.queue_time_seconds]
-        if queue_times:
-            avg_queue = sum(queue_times) / len(queue_times)
-            max_queue = max(queue_times)
+        count = immediate + queued
+        if count:
+            avg_queue = total_queue / count
 
             print(f"   Average queue time: {avg_queue:.1f}s")
             print(f"   Max queue time: {max_queue:.1f}s")
 
             # Identify which workflows had to queue
-            immediate = [m for m in metrics if m.queue_time_seconds and m.queue_time_seconds < 10]
-            queued = [m for m in metrics if m.queue_time_seconds and m.queue_time_seconds >= 10]
-
-            print(f"   Immediate execution: {len(immediate)}")
-            print(f"   Had to queue: {len(queued)}")
+            print(f"   Immediate execution: {immediate}")
+            print(f"   Had to queue: {queued}")
+
+    @_buffered_stdout()
+    def _analyze_sustained_performance(self, metrics: Iterable, duration_minutes):
+        """
+        Analyze sustained load performance (metrics may be any single-pass iterable)
+        Only the queue times are retained, for the first-half/second-half comparison
+        """
+        total = 0
+        queue_times = []
+        for m in metrics:
+            total += 1
+            if m.queue_time_seconds:
+                queue_times.append(m.queue_time_seconds)
 
-    def _analyze_sustained_performance(self, metrics, duration_minutes):
-        """Analyze sustained load performance"""
-        if not metrics:
+        if not total:
             return
 
         print(f"\n📊 Sustained Load Analysis:")
         print(f"   Duration: {duration_minutes} minutes")
-        print(f"   Total workflows: {len(metrics)}")
+        print(f"   Total workflows: {total}")
         print(f"   Target: {4 * duration_minutes} workflows")
 
         # Calculate actual throughput
-        actual_throughput = len(metrics) / duration_minutes
+        actual_throughput = total / duration_minutes
 
         print(f"   Actual throughput: {actual_throughput:.1f} workflows/minute")
         print(f"   Target throughput: 4.0 workflows/minute")
 
         # Analyze queue times over time
-        queue_times = [m.queue_time_seconds for m in metrics if m.queue_time_seconds]
         if queue_times:
-            avg_queue = sum(queue_times) / len(queue_times)
+            total_queue = sum(queue_times)
+            avg_queue = total_queue / len(queue_times)
             print(f"   Average queue time: {avg_queue:.1f}s")
 
-            # Check if queue is growing
-            first_half = queue_times[:len(queue_times)//2]
-            second_half = queue_times[len(queue_times)//2:]
-
-            if first_half and second_half:
-                first_avg = sum(first_half) / len(first_half)
-                second_avg = sum(second_half) / len(second_half)
+            # Check if queue is growing; the second half's sum is the remainder of the total
+            half = len(queue_times) // 2
+            if half:
+                first_sum = sum(itertools.islice(queue_times, half))
+                first_avg = first_sum / half
+                second_avg = (total_queue - first_sum) / (len(queue_times) - half)
 
                 if second_avg > first_avg * 1.5:
                     print(f"   ⚠️  Queue growing: {first_avg:.1f}s → {second_avg:.1f}s")
                 else:
                     print(f"   ✅ Queue stable: {first_avg:.1f}s → {second_avg:.1f}s")
 
-    def _analyze_batch_metrics(self, metrics, batch_size, runner_limit):
-        """Analyze metrics for a specific batch size"""
-        if not metrics:
+    @_buffered_stdout()
+    def _analyze_batch_metrics(self, metrics: Iterable, batch_size, runner_limit):
+        """Analyze metrics for a specific batch size (metrics may be any single-pass iterable)"""
+        total = 0
+        total_queue = 0.0
+        count = 0
+        for m in metrics:
+            total += 1
+            if m.queue_time_seconds:
+                total_queue += m.queue_time_seconds
+                count += 1
+
+        if not total:
             return
 
-        queue_times = [m.queue_time_seconds for m in metrics if m.queue_time_seconds]
-        avg_queue = sum(queue_times) / len(queue_times) if queue_times else 0
+        avg_queue = total_queue / count if count else 0
 
         print(f"   Batch {batch_size}: Avg queue time: {avg_queue:.1f}s")
 
@@ -385,6 +466,9 @@ async def main():
     except Exception as e:
         print(f"\n❌ Error: {str(e)}")
         sys.exit(1)
+    finally:
+        # Every test's dispatcher shares one connection pool; release it once at the end
+        await close_shared_connector()
 
 
 if __name__ == "__main__":
@@ -5,17 +5,87 @@ Tests your 4 ECS runners using configurable sleep durations
 """
 
 import asyncio
+import contextlib
 import os
 import sys
 import time
-from datetime import datetime
+from dataclasses import dataclass, field
 from typing import List, Dict
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from dispatcher import GitHubWorkflowDispatcher, WorkflowDispatchRequest
+from dispatcher import GitHubWorkflowDispatcher, WorkflowDispatchRequest, close_shared_connector
 from config_manager import ConfigManager
 
+# ECS Fargate runners available to the test workflows
+RUNNER_COUNT = 4
+
+# Between scenarios, probe every DRAIN_POLL_INTERVAL seconds until no runner is
+# busy, for at most DRAIN_MAX_WAIT seconds
+DRAIN_POLL_INTERVAL = 2
+DRAIN_MAX_WAIT = 30
+
+
+@dataclass(slots=True, frozen=True)
+class ScenarioSpec:
+    """A sleep-workflow scenario and its expected wall time on the runner pool"""
+    sleep: int
+    jobs: int
+    name: str
+    runners: int = RUNNER_COUNT
+    waves: int = field(init=False)
+    expected_time: int = field(init=False)
+
+    def __post_init__(self):
+        # Jobs run in waves of `runners`; ceiling division, at least one wave
+        waves = max(1, -(-self.jobs // self.runners))
+        object.__setattr__(self, "waves", waves)
+        object.__setattr__(self, "expected_time", self.sleep * waves)
+
+    @property
+    def expected_queue(self) -> str:
+        if self.jobs <= self.runners:
+            return "No queuing expected"
+        return f"{self.jobs - self.runners} jobs will queue"
+
+
+# Full suite, computed once at import
+SCENARIOS = (
+    ScenarioSpec(60, 1, "single_job"),        # Under-utilization
+    ScenarioSpec(60, 4, "perfect_fit"),       # Exactly 4 runners
+    ScenarioSpec(60, 6, "slight_overload"),   # 2 jobs queue
+    ScenarioSpec(60, 8, "double_capacity"),   # 4 jobs queue
+    ScenarioSpec(30, 4, "quick_jobs"),        # Quick execution
+    ScenarioSpec(30, 8, "quick_overload"),    # Quick with queue
+    ScenarioSpec(10, 12, "rapid_burst"),      # Many quick jobs
+    ScenarioSpec(120, 4, "long_running"),     # Slow jobs
+)
+
+
+async def wait_for_drain(dispatcher: GitHubWorkflowDispatcher, owner: str, repo: str,
+                         max_wait: float = DRAIN_MAX_WAIT) -> float:
+    """
+    Wait until none of the repository's runners is busy, capped at max_wait
+    seconds. A finished run can leave its runners busy while they clean up
+    and re-register, so this checks the runners rather than the run.
+    Returns the seconds actually waited
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + max_wait
+
+    while True:
+        busy = await dispatcher.count_busy_runners(owner, repo)
+        remaining = deadline - loop.time()
+        # None means the probe failed (e.g. no admin scope); fall back to
+        # waiting out the cap, the fixed pause this replaced
+        if busy == 0 or remaining <= 0:
+            break
+        await asyncio.sleep(min(DRAIN_POLL_INTERVAL, remaining))
+
+    return loop.time() - start
+
+
 class ECSRunnerTester:
     """Simple tester for ECS Fargate runners using sleep workflows"""
 
@@ -23,36 +93,36 @@ class ECSRunnerTester:
         self.config = ConfigManager()
         self.results = []
 
-    async def run_sleep_test(self, sleep_duration: int, job_count: int, test_name: str) -> Dict:
+    async def run_sleep_test(self, spec: ScenarioSpec,
+                             dispatcher: GitHubWorkflowDispatcher = None) -> Dict:
         """
         Run a single test with sleep workflow
 
         Args:
-            sleep_duration: How long each job sleeps (seconds)
-            job_count: Number of parallel jobs to run
-            test_name: Unique name for this test
+            spec: Scenario to run (sleep seconds per job, parallel job count,
+                unique test name) with its expected wall time on the runners
+            dispatcher: Open dispatcher to reuse; a new one is opened if omitted
         """
         print(f"\n{'='*60}")
-        print(f"Test: {test_name}")
-        print(f"Jobs: {job_count} | Sleep: {sleep_duration}s")
+        print(f"Test: {spec.name}")
+        print(f"Jobs: {spec.jobs} | Sleep: {spec.sleep}s")
         print('='*60)
 
         # Calculate expected behavior with 4 runners
-        if job_count <= 4:
-            expected_time = sleep_duration
-            expected_queue = "No queuing expected"
-        else:
-            waves = (job_count + 3) // 4  # Ceiling division
-            expected_time = sleep_duration * waves
-            expected_queue = f"{job_count - 4} jobs will queue"
+        expected_time = spec.expected_time
 
-        print(f"Expected: {expected_time}s total | {expected_queue}")
+        print(f"Expected: {expected_time}s total | {spec.expected_queue}")
         print("-"*60)
 
-        async with GitHubWorkflowDispatcher(
-            token=self.config.github.token,
-            max_concurrent=100  # No artificial limit - let ECS handle it
-        ) as dispatcher:
+        if dispatcher is None:
+            dispatcher_ctx = GitHubWorkflowDispatcher(
+                token=self.config.github.token,
+                max_concurrent=100  # No artificial limit - let ECS handle it
+            )
+        else:
+            dispatcher_ctx = contextlib.nullcontext(dispatcher)
+
+        async with dispatcher_ctx as dispatcher:
 
             # Create workflow request
             request = WorkflowDispatchRequest(
@@ -60,18 +130,19 @@ class ECSRunnerTester:
                 repo=self.config.github.repo,
                 workflow_id="runner_test.yml",
                 ref="main",
-                test_id=test_name,
+                test_id=spec.name,
                 inputs={
-                    "test_id": test_name,
-                    "sleep_duration": str(sleep_duration),
-                    "job_count": str(job_count),
+                    "test_id": spec.name,
+                    "sleep_duration": str(spec.sleep),
+                    "job_count": str(spec.jobs),
                     "job_type": "parallel"
                 }
             )
 
             # Dispatch workflow
-            start_time = time.time()
-            print(f"Dispatching workflow at {datetime.now().strftime('%H:%M:%S')}...")
+            # Durations on the monotonic clock; wall-clock time is only for display
+            start_ns = time.monotonic_ns()
+            print(f"Dispatching workflow at {time.strftime('%H:%M:%S')}...")
 
             run_id = await dispatcher.dispatch_workflow(request)
 
@@ -93,12 +164,12 @@ class ECSRunnerTester:
             )
 
             # Calculate results
-            actual_time = time.time() - start_time
+            actual_time = (time.monotonic_ns() - start_ns) / 1e9
 
             result = {
-                "test_name": test_name,
-                "sleep_duration": sleep_duration,
-                "job_count": job_count,
+                "test_name": spec.name,
+                "sleep_duration": spec.sleep,
+                "job_count": spec.jobs,
                 "expected_time": expected_time,
                 "actual_time": actual_time,
                 "difference": actual_time - expected_time,
@@ -126,59 +197,63 @@ class ECSRunnerTester:
         print("ECS FARGATE RUNNER TEST SUITE (4 Runners)")
         print("="*70)
 
-        # Test scenarios
-        tests = [
-            # (sleep_seconds, job_count, test_name)
-            (60, 1, "single_job"),        # Under-utilization
-            (60, 4, "perfect_fit"),       # Exactly 4 runners
-            (60, 6, "slight_overload"),   # 2 jobs queue
-            (60, 8, "double_capacity"),   # 4 jobs queue
-            (30, 4, "quick_jobs"),        # Quick execution
-            (30, 8, "quick_overload"),    # Quick with queue
-            (10, 12, "rapid_burst"),      # Many quick jobs
-            (120, 4, "long_running"),     # Slow jobs
-        ]
-
-        for sleep, jobs, name in tests:
-            await self.run_sleep_test(sleep, jobs, name)
+        # Scenarios run one at a time: they all measure the same 4-runner pool,
+        # so overlapping them would mix their queue times. One dispatcher for
+        # the whole suite keeps the connection pool warm between scenarios.
+        async with GitHubWorkflowDispatcher(
+            token=self.config.github.token,
+            max_concurrent=100  # No artificial limit - let ECS handle it
+        ) as dispatcher:
+            for spec in SCENARIOS:
+                await self.run_sleep_test(spec, dispatcher)
 
-            # Wait between tests to let runners clear
-            wait_time = 30
-            print(f"\n⏳ Waiting {wait_time}s before next test...")
-            await asyncio.sleep(wait_time)
+                # Wait between tests to let runners clear, only as long as
+                # any of them is still busy
+                print(f"\n⏳ Waiting up to {DRAIN_MAX_WAIT}s for runners to clear...")
+                waited = await wait_for_drain(
+                    dispatcher, self.config.github.owner, self.config.github.repo
+                )
+                print(f"   Waited {waited:.0f}s")
 
         # Print summary
         self.print_summary()
 
     def print_summary(self):
         """Print test summary"""
-        print("\n" + "="*70)
-        print("TEST SUMMARY")
-        print("="*70)
-
-        print("\n| Test Name | Jobs | Sleep | Expected | Actual | Diff | Status |")
-        print("|-----------|------|-------|----------|--------|------|--------|")
-
+        # One pass over the results builds the table rows and the derived
+        # throughput columns; the whole summary is then written in one call
+        rows = []
+        throughput_lines = []
         for r in self.results:
-            print(f"| {r['test_name']:<13} | {r['job_count']:>4} | {r['sleep_duration']:>5}s | "
-                  f"{r['expected_time']:>8}s | {r['actual_time']:>6.1f}s | "
-                  f"{r['difference']:>+5.1f}s | {r['status']:<7} |")
+            rows.append(f"| {r['test_name']:<13} | {r['job_count']:>4} | {r['sleep_duration']:>5}s | "
+                        f"{r['expected_time']:>8}s | {r['actual_time']:>6.1f}s | "
+                        f"{r['difference']:>+5.1f}s | {r['status']:<7} |")
 
-        # Calculate throughput
-        print("\n📈 Throughput Analysis (4 Runners):")
-        print("-"*40)
-
-        for r in self.results:
             if r['actual_time'] > 0:
                 throughput = (r['job_count'] / r['actual_time']) * 60
                 theoretical = min(4, r['job_count']) * (60 / r['sleep_duration'])
                 efficiency = (throughput / theoretical) * 100 if theoretical > 0 else 0
 
-                print(f"{r['test_name']}:")
-                print(f"  Actual: {throughput:.1f} jobs/min")
-                print(f"  Theoretical: {theoretical:.1f} jobs/min")
-                print(f"  Efficiency: {efficiency:.1f}%")
-
+                throughput_lines += [
+                    f"{r['test_name']}:",
+                    f"  Actual: {throughput:.1f} jobs/min",
+                    f"  Theoretical: {theoretical:.1f} jobs/min",
+                    f"  Efficiency: {efficiency:.1f}%",
+                ]
+
+        summary = [
+            "\n" + "="*70,
+            "TEST SUMMARY",
+            "="*70,
+            "\n| Test Name | Jobs | Sleep | Expected | Actual | Diff | Status |",
+            "|-----------|------|-------|----------|--------|------|--------|",
+            *rows,
+            # Calculate throughput
+            "\n📈 Throughput Analysis (4 Runners):",
+            "-"*40,
+            *throughput_lines,
+        ]
+        print("\n".join(summary))
 
 async def quick_capacity_check():
     """Quick check to verify 4 runners are available"""
@@ -188,11 +263,7 @@ async def quick_capacity_check():
     tester = ECSRunnerTester()
 
     # Test exactly 4 parallel jobs for 10 seconds
-    result = await tester.run_sleep_test(
-        sleep_duration=10,
-        job_count=4,
-        test_name="capacity_check"
-    )
+    result = await tester.run_sleep_test(ScenarioSpec(sleep=10, jobs=4, name="capacity_check"))
 
     if result and result['actual_time'] < 20:
         print("\n✅ All 4 runners are working correctly!")
@@ -227,29 +298,33 @@ async def main():
         print("\nCancelled")
         sys.exit(0)
 
-    if choice == "1":
-        await quick_capacity_check()
+    try:
+        if choice == "1":
+            await quick_capacity_check()
 
-    elif choice == "2":
-        tester = ECSRunnerTester()
-        await tester.run_test_suite()
+        elif choice == "2":
+            tester = ECSRunnerTester()
+            await tester.run_test_suite()
 
-    elif choice == "3":
-        try:
-            sleep = int(input("Sleep duration (seconds): "))
-            jobs = int(input("Number of jobs: "))
-            name = input("Test name: ") or f"custom_{sleep}s_{jobs}j"
+        elif choice == "3":
+            try:
+                sleep = int(input("Sleep duration (seconds): "))
+                jobs = int(input("Number of jobs: "))
+                name = input("Test name: ") or f"custom_{sleep}s_{jobs}j"
 
-            tester = ECSRunnerTester()
-            await tester.run_sleep_test(sleep, jobs, name)
+                tester = ECSRunnerTester()
+                await tester.run_sleep_test(ScenarioSpec(sleep, jobs, name))
 
-        except (ValueError, KeyboardInterrupt):
-            print("\nInvalid input or cancelled")
-            sys.exit(1)
+            except (ValueError, KeyboardInterrupt):
+                print("\nInvalid input or cancelled")
+                sys.exit(1)
 
-    else:
-        print("Invalid choice")
-        sys.exit(1)
+        else:
+            print("Invalid choice")
+            sys.exit(1)
+    finally:
+        # Every dispatcher shares one connection pool; release it once at the end
+        await close_shared_connector()
 
     print("\n✅ Testing complete!")
     print("\n💡 Key Insights:")
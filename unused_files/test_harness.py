@@ -16,7 +16,7 @@ import logging
 from pathlib import Path
 
 # Import our modules
-from dispatcher import GitHubWorkflowDispatcher, WorkflowDispatchRequest
+from dispatcher import GitHubWorkflowDispatcher, WorkflowDispatchRequest, close_shared_connector
 from metrics_collector import MetricsCollector, MetricsStorage, MetricsAnalyzer, WorkflowMetrics
 from config_manager import ConfigManager
 
@@ -131,7 +131,8 @@ class TestHarness:
 
                 # Aggregate and analyze
                 aggregated = MetricsAnalyzer.aggregate_metrics(
-                    workflow_metrics, test_id, "performance"
+                    workflow_metrics, test_id, "performance",
+                    running=self.metrics_storage.running
                 )
 
                 # Print summary
@@ -219,7 +220,9 @@ class TestHarness:
 
                 if metrics:
                     # Aggregate results
-                    aggregated = MetricsAnalyzer.aggregate_metrics(metrics, test_id, "load")
+                    aggregated = MetricsAnalyzer.aggregate_metrics(
+                        metrics, test_id, "load", running=self.metrics_storage.running
+                    )
                     MetricsAnalyzer.print_summary(aggregated)
 
                     # Save metrics
@@ -546,16 +549,24 @@ def main():
     # Save configuration snapshot
     harness.config.save_config_snapshot()
 
-    # Run tests
+    async def run_selected():
+        try:
+            if args.test == 'suite':
+                await harness.run_test_suite()
+            elif args.test == 'performance':
+                await harness.run_performance_test()
+            elif args.test == 'load':
+                await harness.run_load_test()
+            elif args.test == 'stress':
+                await harness.run_stress_test()
+        finally:
+            # Every test's dispatcher shares one connection pool; release it once at the end
+            await close_shared_connector()
+
+    # Run tests (the storage context flushes and closes the metrics file)
     try:
-        if args.test == 'suite':
-            asyncio.run(harness.run_test_suite())
-        elif args.test == 'performance':
-            asyncio.run(harness.run_performance_test())
-        elif args.test == 'load':
-            asyncio.run(harness.run_load_test())
-        elif args.test == 'stress':
-            asyncio.run(harness.run_stress_test())
+        with harness.metrics_storage:
+            asyncio.run(run_selected())
 
     except KeyboardInterrupt:
         logger.info("\n⚠️  Test interrupted by user")
@@ -7,10 +7,38 @@ import asyncio
 import os
 import sys
 import json
+from contextlib import contextmanager
 from datetime import datetime
 
-# Setup environment
-os.environ['GITHUB_TOKEN'] = os.environ.get('GITHUB_TOKEN', '')
+import requests
+
+
+def validate_token(token) -> bool:
+    """Check the token against GET /user so a bad token fails before any dispatch."""
+    try:
+        r = requests.get('https://api.github.com/user',
+                         headers={'Authorization': f'token {token}'}, timeout=5)
+    except requests.RequestException as e:
+        print(f"ERROR: Could not reach GitHub to validate token: {e}")
+        return False
+    if r.status_code != 200:
+        print(f"ERROR: GITHUB_TOKEN rejected by GitHub ({r.status_code})")
+        return False
+    return True
+
+
+@contextmanager
+def override_profile(env, name, **kwargs):
+    """Temporarily override attributes of env.test_profiles[name], restoring them on exit."""
+    profile = env.test_profiles[name]
+    saved = {key: getattr(profile, key) for key in kwargs}
+    for key, value in kwargs.items():
+        setattr(profile, key, value)
+    try:
+        yield profile
+    finally:
+        for key, value in saved.items():
+            setattr(profile, key, value)
 
 async def test_tracking():
     """Run a quick test with tracking enabled."""
@@ -19,7 +47,14 @@ async def test_tracking():
     print("=" * 70)
     print()
 
-    # Import after setting up environment
+    # Fail fast on a missing or invalid token, before loading anything
+    github_token = os.environ.get('GITHUB_TOKEN')
+    if not github_token:
+        print("ERROR: GITHUB_TOKEN not set")
+        return False
+    if not validate_token(github_token):
+        return False
+
     from src.orchestrator.environment_switcher import EnvironmentSwitcher
     from src.orchestrator.scenario_runner import ScenarioRunner
 
@@ -29,11 +64,6 @@ async def test_tracking():
     environment = switcher.load_environment('aws_ecs')
 
     # Create scenario runner
-    github_token = os.environ.get('GITHUB_TOKEN')
-    if not github_token:
-        print("ERROR: GITHUB_TOKEN not set")
-        return False
-
     runner = ScenarioRunner(environment, github_token)
 
     # Run a quick performance test (should use tracking automatically)
@@ -41,15 +71,9 @@ async def test_tracking():
     print("This will dispatch 3 workflows and tag them with a unique test_run_id")
     print()
 
-    # Override the performance profile temporarily for quick test
-    original_duration = environment.test_profiles['performance'].duration_minutes
-    original_rate = environment.test_profiles['performance'].jobs_per_minute
-
-    # Set to 1 minute duration, 3 jobs per minute
-    environment.test_profiles['performance'].duration_minutes = 1
-    environment.test_profiles['performance'].jobs_per_minute = 3
-
-    try:
+    # Override the performance profile temporarily for quick test:
+    # 1 minute duration, 3 jobs per minute
+    with override_profile(environment, 'performance', duration_minutes=1, jobs_per_minute=3):
         # Run the test
         metrics = await runner.run_test_profile('performance')
 
@@ -75,11 +99,6 @@ async def test_tracking():
             print("\n❌ ERROR: Test run tracker was not initialized")
             return False
 
-    finally:
-        # Restore original settings
-        environment.test_profiles['performance'].duration_minutes = original_duration
-        environment.test_profiles['performance'].jobs_per_minute = original_rate
-
 
 if __name__ == "__main__":
     success = asyncio.run(test_tracking())
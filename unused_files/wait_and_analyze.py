@@ -5,51 +5,128 @@ This is useful when the test ends before all workflows finish.
 """
 import os
 import sys
+import hmac
 import time
-import json
+import random
+import asyncio
+import statistics
+import queue
+import hashlib
+import logging
 import argparse
-import requests
-from datetime import datetime, timedelta
+import contextlib
+import logging.handlers
+import aiohttp
+from aiohttp import web
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 from src.orchestrator.test_run_tracker import load_test_run, list_test_runs
 from src.analysis.test_specific_analyzer import TestAnalyzerFactory
+from dispatcher import _loads
+
+logger = logging.getLogger(__name__)
+
+
+# In-flight jobs requests during analysis
+MAX_CONCURRENT_REQUESTS = 16
+
+# GitHub's transient gateway errors are retried with exponential backoff
+RETRY_STATUSES = frozenset({502, 503, 504})
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+# Wait-loop polling: start fast, back off while nothing finishes, reset on progress
+INITIAL_POLL_INTERVAL = 5
+MAX_POLL_INTERVAL = 60
+POLL_BACKOFF = 1.5
+
+# Webhook waits still poll this often (seconds) to catch deliveries that never arrive
+WEBHOOK_RECONCILE_INTERVAL = 60
+
+# While waiting, log an interim summary each time this many more runs have completed
+INTERIM_SUMMARY_EVERY = 10
+
+# Conditional-GET cache for runs listing pages: (url, params) -> (etag, workflow_runs, next_url).
+# A 304 reply costs no rate-limit budget and nothing to parse.
+_etag_cache = {}
+
+# Jobs of runs that have concluded never change, so they are fetched once per run id
+_jobs_cache = {}
+
+# Per finished job: (queue_time, exec_time, total_time, failed), so timestamps parse once
+_metrics_cache = {}
+
+
+@contextlib.asynccontextmanager
+async def github_get(session: aiohttp.ClientSession, url: str, **kwargs):
+    """GET on the shared keep-alive session, retrying 502/503/504. Yields the final response."""
+    attempt = 0
+    while True:
+        async with session.get(url, **kwargs) as response:
+            if response.status not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+                yield response
+                return
+
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+        attempt += 1
+
+
+async def fetch_runs(session: aiohttp.ClientSession, url: str, params: dict = None) -> list:
+    """Fetch every page of a runs listing, following Link: rel="next"."""
+    all_runs = []
+    while url:
+        key = (url, tuple(params.items()) if params else ())
+        cached = _etag_cache.get(key)
+        headers = {'If-None-Match': cached[0]} if cached else None
+        async with github_get(session, url, params=params, headers=headers) as r:
+            if r.status == 304:
+                _, runs, next_url = cached
+            else:
+                runs = _loads(await r.read())['workflow_runs']
+                next_link = r.links.get('next')
+                next_url = str(next_link['url']) if next_link else None
+                if r.headers.get('ETag'):
+                    _etag_cache[key] = (r.headers['ETag'], runs, next_url)
+
+        all_runs.extend(runs)
+        # The next link already carries the query string
+        url, params = next_url, None
+    return all_runs
+
+
+def tracking_window(tracking_data: dict) -> tuple:
+    """
+    UTC bounds of a test run, start to end + 30 minutes, as GitHub-format
+    timestamps. Computed once per run rather than on every poll.
+    """
+    # Tracking times are local unless they carry an offset; normalize to UTC
+    start = datetime.fromisoformat(tracking_data['start_time']).astimezone(timezone.utc)
+    end = datetime.fromisoformat(tracking_data['end_time']).astimezone(timezone.utc)
 
+    # Add buffer time for workflows still running
+    end_buffer = end + timedelta(minutes=30)
 
-def check_workflows_status(token: str, test_run_id: str = None,
-                          owner: str = "Devopulence",
-                          repo: str = "pythonProject"):
-    """Check if workflows from a test run are complete."""
-    headers = {'Authorization': f'token {token}'}
-
-    # Load test run tracking data
-    try:
-        tracking_data = load_test_run(test_run_id, "aws-ecs")
-    except FileNotFoundError:
-        print(f"Error: Test run '{test_run_id}' not found")
-        return None
-
-    print(f"Checking test run: {tracking_data['test_run_id']}")
-    print(f"Expected workflows: {tracking_data['workflow_count']}")
+    return f"{start:%Y-%m-%dT%H:%M:%SZ}", f"{end_buffer:%Y-%m-%dT%H:%M:%SZ}"
 
-    # Calculate time window for the test
-    start = datetime.fromisoformat(tracking_data['start_time'])
-    end = datetime.fromisoformat(tracking_data['end_time'])
 
-    # Add buffer time for workflows still running
-    end_buffer = end + timedelta(minutes=30)
+async def check_workflows_status(session: aiohttp.ClientSession, tracking_data: dict,
+                                 window: tuple,
+                                 owner: str = "Devopulence",
+                                 repo: str = "pythonProject"):
+    """Check if workflows from a test run are complete."""
+    start, end_buffer = window
 
-    # Fetch workflows from GitHub
+    # Fetch workflows from GitHub, letting the API narrow to the test window
     url = f'https://api.github.com/repos/{owner}/{repo}/actions/runs'
-    params = {'per_page': 100}
-    r = requests.get(url, headers=headers, params=params)
-    all_runs = r.json()['workflow_runs']
+    params = {'per_page': 100, 'created': f"{start}..{end_buffer}", 'event': 'workflow_dispatch'}
+    all_runs = await fetch_runs(session, url, params)
 
-    # Filter to workflows from this test run
+    # Filter to workflows from this test run. created_at is fixed-width UTC
+    # ("...Z"), so comparing the strings orders them in time without parsing.
     test_workflows = []
     for run in all_runs:
-        created = datetime.fromisoformat(run['created_at'].replace('Z', '+00:00'))
-        if start <= created <= end_buffer:
+        if start <= run['created_at'] <= end_buffer:
             if 'Build' in run.get('name', ''):
                 test_workflows.append(run)
 
@@ -67,56 +144,108 @@ def check_workflows_status(token: str, test_run_id: str = None,
     }
 
 
-def analyze_completed_workflows(status_data: dict, token: str,
-                               owner: str = "Devopulence",
-                               repo: str = "pythonProject"):
-    """Analyze completed workflows."""
-    headers = {'Authorization': f'token {token}'}
-
-    # Collect metrics from completed workflows
+async def fetch_jobs(session: aiohttp.ClientSession, sem: asyncio.Semaphore,
+                     run: dict, owner: str, repo: str) -> list:
+    """Fetch job-level data for one workflow run, cached once the run has concluded."""
+    if run['id'] in _jobs_cache:
+        return _jobs_cache[run['id']]
+
+    jobs_url = f'https://api.github.com/repos/{owner}/{repo}/actions/runs/{run["id"]}/jobs'
+    async with sem:
+        async with github_get(session, jobs_url) as jr:
+            if jr.status != 200:
+                # Not cached, so the next collection pass asks again
+                logger.warning(f"  Could not fetch jobs for run {run['id']}: HTTP {jr.status}")
+                return []
+            jobs = _loads(await jr.read()).get('jobs', [])
+
+    if run.get('conclusion'):
+        _jobs_cache[run['id']] = jobs
+    return jobs
+
+
+def job_metrics(job: dict) -> tuple:
+    """Queue/execution/total minutes for a job (None if it never ran) and whether it failed."""
+    cached = _metrics_cache.get(job['id'])
+    if cached is not None:
+        return cached
+
+    queue_time = exec_time = total_time = None
+    if job.get('started_at') and job.get('completed_at'):
+        # 3.11+ fromisoformat parses GitHub's trailing "Z" in C, no str.replace copy needed
+        created = datetime.fromisoformat(job['created_at'])
+        started = datetime.fromisoformat(job['started_at'])
+        completed = datetime.fromisoformat(job['completed_at'])
+
+        queue_time = (started - created).total_seconds() / 60
+        exec_time = (completed - started).total_seconds() / 60
+        total_time = (completed - created).total_seconds() / 60
+
+    result = (queue_time, exec_time, total_time, job.get('conclusion') == 'failure')
+    if job.get('completed_at'):
+        _metrics_cache[job['id']] = result
+    return result
+
+
+async def collect_job_metrics(status_data: dict, session: aiohttp.ClientSession,
+                              owner: str = "Devopulence",
+                              repo: str = "pythonProject") -> tuple:
+    """Queue, execution and total minutes of the jobs in completed runs, plus the failure count."""
     queue_times = []
     exec_times = []
     total_times = []
     failed = 0
 
-    print("\nCollecting metrics from completed workflows...")
-
-    for run in status_data['workflows']:
-        if run['status'] != 'completed':
-            continue
-
-        # Get job-level data for accurate metrics
-        jobs_url = f'https://api.github.com/repos/{owner}/{repo}/actions/runs/{run["id"]}/jobs'
-        jr = requests.get(jobs_url, headers=headers)
-        jobs = jr.json().get('jobs', [])
+    # Get job-level data for accurate metrics, all runs at once
+    sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    all_jobs = await asyncio.gather(*[
+        fetch_jobs(session, sem, run, owner, repo)
+        for run in status_data['workflows']
+        if run['status'] == 'completed'
+    ])
 
+    for jobs in all_jobs:
         for job in jobs:
-            if job.get('started_at') and job.get('completed_at'):
-                created = datetime.fromisoformat(job['created_at'].replace('Z', '+00:00'))
-                started = datetime.fromisoformat(job['started_at'].replace('Z', '+00:00'))
-                completed = datetime.fromisoformat(job['completed_at'].replace('Z', '+00:00'))
-
-                queue_time = (started - created).total_seconds() / 60
-                exec_time = (completed - started).total_seconds() / 60
-                total_time = (completed - created).total_seconds() / 60
-
+            queue_time, exec_time, total_time, job_failed = job_metrics(job)
+            if queue_time is not None:
                 queue_times.append(queue_time)
                 exec_times.append(exec_time)
                 total_times.append(total_time)
 
-            if job.get('conclusion') == 'failure':
+            if job_failed:
                 failed += 1
 
+    return queue_times, exec_times, total_times, failed
+
+
+def interim_summary(queue_times: list, total_times: list, failed: int) -> str:
+    """One-line snapshot of the jobs finished so far."""
+    return (f"  Interim: {len(queue_times)} jobs, queue avg {statistics.fmean(queue_times):.1f}m "
+            f"max {max(queue_times):.1f}m, total median {statistics.median(total_times):.1f}m, "
+            f"{failed} failed")
+
+
+async def analyze_completed_workflows(status_data: dict, session: aiohttp.ClientSession,
+                                      owner: str = "Devopulence",
+                                      repo: str = "pythonProject"):
+    """Analyze completed workflows."""
+    logger.info("\nCollecting metrics from completed workflows...")
+
+    # Collect metrics from completed workflows
+    queue_times, exec_times, total_times, failed = await collect_job_metrics(
+        status_data, session, owner, repo
+    )
+
     if not queue_times:
-        print("No completed workflows with metrics found")
+        logger.info("No completed workflows with metrics found")
         return None
 
     # Get test type from tracking data
     test_type = status_data['tracking_data'].get('test_type', 'performance')
 
     # Run test-specific analysis
-    print(f"\n🔬 Running {test_type} test analysis...")
-    print("=" * 60)
+    logger.info(f"\n🔬 Running {test_type} test analysis...")
+    logger.info("=" * 60)
 
     analyzer = TestAnalyzerFactory.get_analyzer(test_type)
 
@@ -142,10 +271,10 @@ def analyze_completed_workflows(status_data: dict, token: str,
     # Generate recommendations
     recommendations = analyzer.generate_recommendations(analysis)
     if recommendations:
-        print("\n📋 Recommendations:")
-        print("-" * 40)
+        logger.info("\n📋 Recommendations:")
+        logger.info("-" * 40)
         for rec in recommendations:
-            print(f"  {rec}")
+            logger.info(f"  {rec}")
 
     return analysis
 
@@ -153,38 +282,118 @@ def analyze_completed_workflows(status_data: dict, token: str,
 def display_analysis(test_type: str, analysis: dict):
     """Display test analysis results."""
     if test_type == "performance":
-        print("\n🎯 Performance Analysis:")
-        print("-" * 40)
+        logger.info("\n🎯 Performance Analysis:")
+        logger.info("-" * 40)
         if "overall_rating" in analysis:
-            print(f"Overall Rating: {analysis['overall_rating']}")
+            logger.info(f"Overall Rating: {analysis['overall_rating']}")
         if "queue_analysis" in analysis:
-            print(f"Queue Health: {analysis['queue_analysis']['health']}")
+            logger.info(f"Queue Health: {analysis['queue_analysis']['health']}")
         if "execution_analysis" in analysis:
-            print(f"Execution Consistency: {analysis['execution_analysis']['consistency']}")
+            logger.info(f"Execution Consistency: {analysis['execution_analysis']['consistency']}")
         if "predictability" in analysis:
-            print(f"Predictability: {analysis['predictability']['score']}")
-            print(f"  {analysis['predictability']['interpretation']}")
+            logger.info(f"Predictability: {analysis['predictability']['score']}")
+            logger.info(f"  {analysis['predictability']['interpretation']}")
         if "baseline_metrics" in analysis:
             sla = analysis['baseline_metrics']['recommended_sla']
-            print(f"\nRecommended SLAs:")
-            print(f"  P50: {sla['p50']:.1f} minutes")
-            print(f"  P95: {sla['p95']:.1f} minutes")
-            print(f"  P99: {sla['p99']:.1f} minutes")
-
+            logger.info(f"\nRecommended SLAs:")
+            logger.info(f"  P50: {sla['p50']:.1f} minutes")
+            logger.info(f"  P95: {sla['p95']:.1f} minutes")
+            logger.info(f"  P99: {sla['p99']:.1f} minutes")
+
+
+async def wait_via_webhook(session: aiohttp.ClientSession, tracking_data: dict, window: tuple,
+                           pending_ids: set, port: int, max_wait: int) -> bool:
+    """
+    Wait for a workflow_run "completed" webhook for every run in pending_ids.
+
+    Serves POST /webhook on the given port; point the repository webhook (or a
+    smee.io tunnel for local runs) at it. Deliveries are verified against
+    GITHUB_WEBHOOK_SECRET when that is set. Runs that finished before the
+    listener was up, or whose delivery was dropped, are picked up by a status
+    check once listening and every WEBHOOK_RECONCILE_INTERVAL seconds after.
+    Returns True if every run completed before max_wait minutes elapsed.
+    """
+    completions = asyncio.Queue()
+    secret = os.environ.get('GITHUB_WEBHOOK_SECRET')
+
+    async def handle(request: web.Request) -> web.Response:
+        body = await request.read()
+        if secret:
+            expected = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+            if not hmac.compare_digest(expected, request.headers.get('X-Hub-Signature-256', '')):
+                return web.Response(status=401)
+
+        if request.headers.get('X-GitHub-Event') == 'workflow_run':
+            payload = _loads(body)
+            if payload.get('action') == 'completed':
+                completions.put_nowait(payload['workflow_run']['id'])
+        return web.Response(status=204)
+
+    app = web.Application()
+    app.router.add_post('/webhook', handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, port=port).start()
+    logger.info(f"  Listening for workflow_run webhooks on :{port}/webhook")
+
+    async def reconcile():
+        status = await check_workflows_status(session, tracking_data, window)
+        pending_ids.difference_update(w['id'] for w in status['workflows'] if w['status'] == 'completed')
 
-def main():
+    try:
+        async with asyncio.timeout(max_wait * 60):
+            await reconcile()
+            while pending_ids:
+                try:
+                    run_id = await asyncio.wait_for(completions.get(), WEBHOOK_RECONCILE_INTERVAL)
+                except TimeoutError:
+                    await reconcile()
+                else:
+                    pending_ids.discard(run_id)
+        return True
+    except TimeoutError:
+        return False
+    finally:
+        await runner.cleanup()
+
+
+async def main():
     parser = argparse.ArgumentParser(description='Wait for workflows and analyze')
     parser.add_argument('--test-run-id', help='Test run ID (default: latest)')
     parser.add_argument('--wait', action='store_true',
                        help='Wait for workflows to complete')
     parser.add_argument('--max-wait', type=int, default=30,
                        help='Maximum minutes to wait (default: 30)')
+    parser.add_argument('--webhook-port', type=int,
+                       help='Wait for workflow_run webhooks on this port instead of polling')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                       help='Also show unchanged poll results')
     args = parser.parse_args()
 
+    # Output is written by a listener thread so a slow pipe (tee, docker logs)
+    # never stalls the poll loop; everything goes through it to keep lines in order
+    log_queue = queue.SimpleQueue()
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter('%(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, console)
+    # force: importing src.orchestrator already configured the root logger
+    logging.basicConfig(level=logging.INFO, format='%(message)s', force=True,
+                        handlers=[logging.handlers.QueueHandler(log_queue)])
+    if args.verbose:
+        logger.setLevel(logging.DEBUG)
+    listener.start()
+    try:
+        await run(args)
+    finally:
+        listener.stop()
+
+
+async def run(args: argparse.Namespace):
+    """Resolve the token and test run, then wait and analyze on one pooled session."""
     # Get GitHub token
     token = os.environ.get('GITHUB_TOKEN')
     if not token:
-        print("Error: GITHUB_TOKEN environment variable not set")
+        logger.error("Error: GITHUB_TOKEN environment variable not set")
         return
 
     # Use latest test run if not specified
@@ -193,45 +402,97 @@ def main():
         runs = list_test_runs("aws-ecs")
         if runs:
             test_run_id = runs[-1]['test_run_id']
-            print(f"Using latest test run: {test_run_id}")
+            logger.info(f"Using latest test run: {test_run_id}")
         else:
-            print("No test runs found")
+            logger.info("No test runs found")
             return
 
-    # Check workflow status
-    status = check_workflows_status(token, test_run_id)
-    if not status:
+    # One pooled session for every poll and jobs request
+    async with aiohttp.ClientSession(
+        headers={'Authorization': f'token {token}'},
+        connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60)
+    ) as session:
+        await wait_and_analyze(session, test_run_id, args.wait, args.max_wait, args.webhook_port)
+
+
+async def wait_and_analyze(session: aiohttp.ClientSession, test_run_id: str,
+                           wait: bool, max_wait: int, webhook_port: int = None):
+    """Poll a test run's workflows, optionally wait for them, then analyze."""
+    # Load test run tracking data once; it doesn't change while polling
+    try:
+        tracking_data = load_test_run(test_run_id, "aws-ecs")
+    except FileNotFoundError:
+        logger.error(f"Error: Test run '{test_run_id}' not found")
         return
 
-    print(f"\nWorkflow Status:")
-    print(f"  Total: {status['total']}")
-    print(f"  Completed: {status['completed']}")
-    print(f"  In Progress: {status['in_progress']}")
+    logger.info(f"Checking test run: {tracking_data['test_run_id']}")
+    logger.info(f"Expected workflows: {tracking_data['workflow_count']}")
+    window = tracking_window(tracking_data)
+
+    # Check workflow status
+    status = await check_workflows_status(session, tracking_data, window)
+
+    logger.info(f"\nWorkflow Status:")
+    logger.info(f"  Total: {status['total']}")
+    logger.info(f"  Completed: {status['completed']}")
+    logger.info(f"  In Progress: {status['in_progress']}")
 
     # Wait for completion if requested
-    if args.wait and not status['all_done']:
-        print(f"\n⏳ Waiting for workflows to complete (max {args.max_wait} minutes)...")
+    if wait and not status['all_done'] and webhook_port:
+        logger.info(f"\n⏳ Waiting for workflows to complete (max {max_wait} minutes)...")
+        pending_ids = {w['id'] for w in status['workflows'] if w['status'] != 'completed'}
+        all_done = await wait_via_webhook(session, tracking_data, window,
+                                          pending_ids, webhook_port, max_wait)
+
+        # One fetch picks up the final state of every run
+        status = await check_workflows_status(session, tracking_data, window)
+        if all_done:
+            logger.info("\n✅ All workflows completed!")
+        else:
+            logger.info(f"\n⚠️ Timeout: Still {status['in_progress']} workflows in progress after {max_wait} minutes")
+
+    elif wait and not status['all_done']:
+        logger.info(f"\n⏳ Waiting for workflows to complete (max {max_wait} minutes)...")
         start_wait = time.time()
-        max_wait_seconds = args.max_wait * 60
+        max_wait_seconds = max_wait * 60
+        delay = INITIAL_POLL_INTERVAL
+        last_completed = last_summary = status['completed']
 
         while time.time() - start_wait < max_wait_seconds:
-            time.sleep(30)  # Check every 30 seconds
-
-            status = check_workflows_status(token, test_run_id)
-            print(f"  Status: {status['completed']} completed, {status['in_progress']} in progress")
+            # Jittered, and never past the max-wait deadline
+            remaining = max_wait_seconds - (time.time() - start_wait)
+            await asyncio.sleep(min(delay + random.uniform(0, delay * 0.1), remaining))
+
+            status = await check_workflows_status(session, tracking_data, window)
+
+            # Only progress is worth a line; unchanged polls are debug noise
+            if status['completed'] > last_completed:
+                logger.info(f"  Status: {status['completed']} completed, {status['in_progress']} in progress")
+                delay = INITIAL_POLL_INTERVAL
+
+                # Fetch jobs of newly finished runs now, while the rest are still
+                # running; they stay cached, so the final analysis has little left to do
+                queue_times, _, total_times, failed = await collect_job_metrics(status, session)
+                if queue_times and status['completed'] - last_summary >= INTERIM_SUMMARY_EVERY:
+                    logger.info(interim_summary(queue_times, total_times, failed))
+                    last_summary = status['completed']
+            else:
+                logger.debug(f"  Status: {status['completed']} completed, {status['in_progress']} in progress")
+                delay = min(delay * POLL_BACKOFF, MAX_POLL_INTERVAL)
+            last_completed = status['completed']
 
             if status['all_done']:
-                print("\n✅ All workflows completed!")
+                logger.info("\n✅ All workflows completed!")
                 break
         else:
-            print(f"\n⚠️ Timeout: Still {status['in_progress']} workflows in progress after {args.max_wait} minutes")
+            logger.info(f"\n⚠️ Timeout: Still {status['in_progress']} workflows in progress after {max_wait} minutes")
 
     # Analyze if we have completed workflows
     if status['completed'] > 0:
-        analyze_completed_workflows(status, token)
+        await analyze_completed_workflows(status, session)
     else:
-        print("\nNo completed workflows to analyze yet")
+        logger.info("\nNo completed workflows to analyze yet")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file